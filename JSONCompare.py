@@ -1,11 +1,209 @@
 #!/usr/bin/python3 -B
 
 import argparse
+import collections
+import concurrent.futures
+import contextlib
+import functools
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
 import re
+import sys
+import tempfile
 
-from JSONParser import JSONParser, JSONPath, JSONElement
+from JSONParser import JSONParser, JSONPath, JSONPathSet, JSONStats, JSONElement
 
 class JSONCompare:
+    UNITS_PER_JOB    = 8
+    SINK_BUFFER_SIZE = 4096
+    HASH_BLOCK_SIZE  = 1048576
+    IDENTICAL_CHAIN  = 3
+
+    KEYED_MEMORY_FACTOR   = 3
+    KEYED_BUFFER_SIZE     = 65536
+    KEYED_MIN_BUFFER_SIZE = 4096
+    KEYED_MAX_BUCKETS     = 64
+    KEYED_RESERVED_FILES  = 16
+    KEYED_HASH_LIMIT      = 2 ** 56
+
+    MISSING = object()
+    ENCODER = json.JSONEncoder(sort_keys=True, separators=(',', ':'))
+
+    _worker = None
+
+    class _LimitReached(Exception):
+        pass
+
+    class _Sink(object):
+        WHOLE_ARRAYS = False
+
+        def __init__(self, stream, limit=None):
+            self.stream = stream
+            self.limit = limit
+            self.count = 0
+            self.records = []
+            self.streaming = True
+            self.field = None
+            self.header = None
+
+        def _record(self, record):
+            if self.header is not None:
+                self.records.append(self.header)
+                self.header = None
+            self.records.append(record)
+            if self.streaming and len(self.records) >= JSONCompare.SINK_BUFFER_SIZE:
+                self.flush()
+
+        def difference(self, path, separator, value1, value2, object1, object2):
+            self._record(self.formatDifference(path, separator, value1, value2, object1, object2))
+            self.tally()
+
+        def tally(self):
+            self.count += 1
+            if self.limit is not None and self.count >= self.limit:
+                raise JSONCompare._LimitReached()
+
+        def warning(self, message):
+            self._record(self.formatWarning(message))
+
+        def extend(self, records):
+            for record in records:
+                self._record(record)
+
+        def section(self, name, field=None):
+            self.field = field or ('file', name)
+            self.header = self.formatSection(name) or None
+
+        def summary(self, name, status, count):
+            self.field = self.header = None
+            self._record(self.formatSummary(name, status, count))
+
+        def totals(self, totals, noun='files'):
+            self.field = self.header = None
+            self._record(self.formatTotals(totals, noun))
+
+        def formatSection(self, name):
+            return ''
+
+        def open(self):
+            pass
+
+        def flush(self):
+            self.stream.write(''.join(self.records))
+            self.records = []
+
+        def close(self):
+            self.flush()
+            self.stream.flush()
+
+    class _TextSink(_Sink):
+        def formatDifference(self, path, separator, value1, value2, object1, object2):
+            return f'-{path} {separator} {value1}\n+{path} {separator} {value2}\n\n'
+
+        def formatWarning(self, message):
+            return f'[WARNING] {message}\n\n'
+
+        def formatSection(self, name):
+            return f'*** {name}\n\n'
+
+        def formatSummary(self, name, status, count):
+            return f'{status:<8} {count:>8}  {name}\n'
+
+        def formatTotals(self, totals, noun):
+            return f'\n{sum(totals.values())} {noun}: ' + ', '.join(f'{count} {status}' for status, count in sorted(totals.items())) + '\n'
+
+    class _QuietSink(_Sink):
+        def __init__(self, stream, limit=None):
+            super().__init__(stream, 1)
+
+        def formatDifference(self, path, separator, value1, value2, object1, object2):
+            return ''
+
+        def formatWarning(self, message):
+            return ''
+
+        def formatSummary(self, name, status, count):
+            return ''
+
+        def formatTotals(self, totals, noun):
+            return ''
+
+    class _JSONLinesSink(_Sink):
+        def formatDifference(self, path, separator, value1, value2, object1, object2):
+            record = { 'op': JSONCompare._operation(object1, object2), 'path': path }
+            if object1 is not JSONCompare.MISSING:
+                record['old'] = object1
+            if object2 is not JSONCompare.MISSING:
+                record['new'] = object2
+            if self.field is not None:
+                record[self.field[0]] = self.field[1]
+            return JSONParser.dumps(record) + '\n'
+
+        def formatWarning(self, message):
+            record = { 'warning': message }
+            if self.field is not None:
+                record[self.field[0]] = self.field[1]
+            return JSONParser.dumps(record) + '\n'
+
+        def formatSummary(self, name, status, count):
+            return JSONParser.dumps({ 'file': name, 'status': status, 'differences': count }) + '\n'
+
+        def formatTotals(self, totals, noun):
+            return JSONParser.dumps({ 'totals': dict(sorted(totals.items())) }) + '\n'
+
+    class _JSONPatchSink(_Sink):
+        WHOLE_ARRAYS = True
+
+        def __init__(self, stream, limit=None):
+            super().__init__(stream, limit)
+            self.written = False
+
+        def formatDifference(self, path, separator, value1, value2, object1, object2):
+            operation = { 'op': JSONCompare._operation(object1, object2), 'path': JSONCompare._pointer(path) }
+            if object2 is not JSONCompare.MISSING:
+                operation['value'] = object2
+            return JSONParser.dumps(operation)
+
+        def warning(self, message):
+            sys.stderr.write(f'[WARNING] {message}\n')
+
+        def open(self):
+            self.stream.write('[')
+
+        def flush(self):
+            if self.records:
+                self.stream.write(('\n' if not self.written else ',\n') + ',\n'.join(self.records))
+                self.written = True
+            self.records = []
+
+        def close(self):
+            self.flush()
+            self.stream.write('\n]\n' if self.written else ']\n')
+            self.stream.flush()
+
+    SINKS = { 'text': _TextSink, 'jsonl': _JSONLinesSink, 'patch': _JSONPatchSink }
+
+    @classmethod
+    def _operation(cls, object1, object2):
+        if object1 is cls.MISSING:
+            return 'add'
+        elif object2 is cls.MISSING:
+            return 'remove'
+        else:
+            return 'replace'
+
+    @classmethod
+    def _pointer(cls, path):
+        tokens = []
+        for kind, key, search, deepsearch in JSONParser._compile(path):
+            if isinstance(key, str) and '\\' in key:
+                key = json.loads(f'"{key}"')
+            tokens.append('/' + str(key).replace('~', '~0').replace('/', '~1'))
+        return ''.join(tokens)
+
     class _ExtendAction(argparse.Action):
         def __call__(self, parser, namespace, values, option_string=None):
             items = getattr(namespace, self.dest) or []
@@ -17,12 +215,35 @@ class JSONCompare:
     def __init__(self):
         parser = argparse.ArgumentParser()
         parser.register('action', 'extend', self._ExtendAction)
-        parser.add_argument('file1', metavar='FILE1', action='store', help='Filename of the old/left JSON')
-        parser.add_argument('file2', metavar='FILE2', action='store', help='Filename of the new/right JSON')
+        parser.add_argument('file1', metavar='FILE1', action='store', help='Filename of the old/left JSON, or directory of JSON files paired by relative path')
+        parser.add_argument('file2', metavar='FILE2', action='store', help='Filename of the new/right JSON, or directory of JSON files paired by relative path')
         parser.add_argument('-s', '--selector', dest='selectors', metavar='SELECTOR', nargs='*', default=[], action='extend', help='List of JSONPath selectors (default: $)')
         parser.add_argument('-m', '--mapping', dest='mappings', metavar='MAPPING', nargs='*', default=[], action='extend', help='List of mappings in the format: JSONPath=keyid (default: none)')
         parser.add_argument('-i', '--ignore', dest='ignores', metavar='IGNORE', nargs='*', default=[], action='extend', help='List of JSONPath to be ignored (default: none)')
+        parser.add_argument('-k', '--key', dest='key', metavar='KEYID', help='Compare FILE1 and FILE2 as JSON Lines, pairing the records by their KEYID field')
+        parser.add_argument('--memory-budget', dest='memory', metavar='MB', type=int, default=256, help='Memory used to hold the records of FILE1 compared at once with --key (default: 256)')
+        parser.add_argument('-j', '--jobs', dest='jobs', metavar='N', type=int, default=1, help='Number of processes used to compare (default: 1)')
+        parser.add_argument('-f', '--format', dest='format', choices=sorted(self.SINKS), default='text', help='Output format of the differences (default: text)')
+        parser.add_argument('--max-diffs', dest='maxdiffs', metavar='N', type=int, default=None, help='Stop after reporting N differences (default: none)')
+        parser.add_argument('--no-skip-identical', dest='skipidentical', action='store_false', help='Compare identical subtrees node by node instead of skipping them')
+        parser.add_argument('--stats', dest='stats', action='store_true', help='Print comparison statistics to stderr')
+        parser.add_argument('-q', '--quiet', dest='quiet', action='store_true', help='Report nothing and exit with status 1 at the first difference')
         self.args = parser.parse_args()
+        self.directories = os.path.isdir(self.args.file1)
+        self._identicalChains = {}
+        if self.directories != os.path.isdir(self.args.file2):
+            parser.error('FILE1 and FILE2 must both be files or both be directories')
+        if self.directories and self.args.format == 'patch' and not self.args.quiet:
+            parser.error('argument -f/--format: patch cannot be used to compare directories')
+        if self.args.key is not None:
+            if self.directories:
+                parser.error('argument -k/--key: cannot be used to compare directories')
+            elif self.args.selectors:
+                parser.error('argument -k/--key: cannot be used with -s/--selector')
+            elif self.args.format == 'patch' and not self.args.quiet:
+                parser.error('argument -f/--format: patch cannot be used with -k/--key')
+            elif self.args.memory < 1:
+                parser.error(f'argument --memory-budget: invalid value: {self.args.memory} (expected: 1 or more)')
 
     def _loadJSONFiles(self):
         self._json1 = JSONParser.load(self.args.file1)
@@ -37,37 +258,317 @@ class JSONCompare:
             self._elements2 = { self._json2.path() : self._json2.object() }
 
     def _processMappings(self):
-        self._mappings = {}
+        self._mappings = JSONPathSet()
         for mapping in self.args.mappings:
             match = re.match(r'^(?P<path>.+)=(?P<keyid>[^=]+)$', mapping)
             if match:
-                self._mappings[JSONPath(match.group('path'))] = match.group('keyid')
+                self._mappings.add(match.group('path'), match.group('keyid'))
             else:
                 raise ValueError(f'Invalid mapping syntax: {mapping}')
 
     def _processIgnores(self):
-        self._ignores = {}
+        self._ignores = JSONPathSet()
         for ignore in self.args.ignores:
             match = re.match(r'^(?P<path>.+)\{(?P<evalop>.+)\}$', ignore)
             if match:
-                self._ignores[JSONPath(match.group('path'))] = match.group('evalop')
+                self._ignores.add(match.group('path'), match.group('evalop'))
             else:
-                self._ignores[JSONPath(ignore)] = None
+                self._ignores.add(ignore, None)
 
-    def _compareJSONElements(self):
+    def _roots(self):
         paths = list(self._elements1.keys())
         paths.extend([ path for path in self._elements2.keys() if path not in paths ])
-        for path in paths:
-            self._compare(self._elements1.get(path, None), self._elements2.get(path, None), path)
+        return [ (self._elements1.get(path, None), self._elements2.get(path, None), path, self._ignores.start(path), self._mappings.start(path)) for path in paths ]
+
+    def _compareJSONElements(self):
+        self._identicalChains.clear()
+        roots = self._roots()
+        if self.args.jobs > 1 and self._sink.limit is None and 'fork' in multiprocessing.get_all_start_methods():
+            self._compareParallel(roots)
+        else:
+            for root in roots:
+                self._compare(*root)
+
+    def _captured(self, function, *args):
+        records, self._sink.records = self._sink.records, []
+        streaming, self._sink.streaming = self._sink.streaming, False
+        try:
+            result = function(*args)
+            return self._sink.records, result
+        finally:
+            self._sink.records = records
+            self._sink.streaming = streaming
+
+    def _partition(self, roots):
+        units = list(roots)
+        while sum(1 for unit in units if isinstance(unit, tuple)) < self.args.jobs * self.UNITS_PER_JOB:
+            expanded = []
+            for unit in units:
+                if isinstance(unit, list):
+                    expanded.append(unit)
+                    continue
+                records, entries = self._captured(self._compareNode, *unit)
+                expanded.append(records)
+                for child in entries:
+                    expanded.append(child if isinstance(child, tuple) else self._captured(child)[0])
+            if len(expanded) == len(units) and all(isinstance(unit, list) for unit in expanded):
+                return expanded
+            units = expanded
+        return units
+
+    @staticmethod
+    def _compareBatch(indexes):
+        self = JSONCompare._worker
+        if self._stats is None:
+            return [ self._captured(self._compare, *self._rootEntries[index])[0] for index in indexes ], None
+        with JSONStats() as stats:
+            return [ self._captured(self._compare, *self._rootEntries[index])[0] for index in indexes ], stats.counters
+
+    def _compareParallel(self, roots):
+        units = self._partition(roots)
+        self._rootEntries = [ unit for unit in units if isinstance(unit, tuple) ]
+        size = max(1, -(-len(self._rootEntries) // (self.args.jobs * self.UNITS_PER_JOB)))
+        batches = [ range(start, min(start + size, len(self._rootEntries))) for start in range(0, len(self._rootEntries), size) ]
+
+        JSONCompare._worker = self
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self.args.jobs, mp_context=multiprocessing.get_context('fork')) as executor:
+            outputs = itertools.chain.from_iterable(self._mergeBatch(*result) for result in executor.map(JSONCompare._compareBatch, batches))
+            for unit in units:
+                self._sink.extend(unit if isinstance(unit, list) else next(outputs))
+        JSONCompare._worker = None
+        self._rootEntries = None
+
+    def _mergeBatch(self, outputs, counters):
+        if counters is not None:
+            self._stats.merge(counters)
+        return outputs
+
+    def _pairFiles(self):
+        files = {}
+        for side, directory in enumerate([ self.args.file1, self.args.file2 ]):
+            for root, dirnames, filenames in os.walk(directory):
+                for filename in filenames:
+                    files.setdefault(os.path.relpath(os.path.join(root, filename), directory), [ False, False ])[side] = True
+        return sorted(files.items())
+
+    def _digest(self, filename):
+        digest = hashlib.blake2b(digest_size=16)
+        with open(filename, 'rb') as file:
+            for block in iter(functools.partial(file.read, self.HASH_BLOCK_SIZE), b''):
+                digest.update(block)
+        return digest.digest()
+
+    def _compareFile(self, relative):
+        filename1 = os.path.join(self.args.file1, relative)
+        filename2 = os.path.join(self.args.file2, relative)
+        self._sink.section(relative)
+        try:
+            if os.path.getsize(filename1) == os.path.getsize(filename2) and self._digest(filename1) == self._digest(filename2):
+                return 'skipped'
+            self._json1 = JSONParser.load(filename1)
+            self._json2 = JSONParser.load(filename2)
+        except Exception as error:
+            self._logWarning(f'Invalid JSON file: {relative}: {type(error).__name__}: {error}  (skipping)')
+            return 'error'
+
+        count = self._sink.count
+        try:
+            self._processSelectors()
+            self._identicalChains.clear()
+            for root in self._roots():
+                self._compare(*root)
+        finally:
+            self._json1 = self._json2 = self._elements1 = self._elements2 = None
+        return 'changed' if self._sink.count > count else 'equal'
+
+    @staticmethod
+    def _compareFileBatch(relatives):
+        self, results = JSONCompare._worker, []
+        with JSONStats() if self._stats is not None else contextlib.nullcontext() as stats:
+            for relative in relatives:
+                count = self._sink.count
+                records, status = self._captured(self._compareFile, relative)
+                if status == 'error':
+                    self._sink.tally()
+                results.append((relative, status, self._sink.count - count, records))
+        return results, stats.counters if stats is not None else None
+
+    def _compareDirectories(self):
+        pairs = self._pairFiles()
+        relatives = [ relative for relative, sides in pairs if all(sides) ]
+        results = {}
+        if self.args.jobs > 1 and self._sink.limit is None and 'fork' in multiprocessing.get_all_start_methods():
+            size = max(1, -(-len(relatives) // (self.args.jobs * self.UNITS_PER_JOB)))
+            batches = [ relatives[start:start + size] for start in range(0, len(relatives), size) ]
+            JSONCompare._worker = self
+            with concurrent.futures.ProcessPoolExecutor(max_workers=self.args.jobs, mp_context=multiprocessing.get_context('fork')) as executor:
+                for result in executor.map(JSONCompare._compareFileBatch, batches):
+                    for relative, status, count, records in self._mergeBatch(*result):
+                        self._sink.extend(records)
+                        self._sink.count += count
+                        results[relative] = (status, count)
+            JSONCompare._worker = None
+            for relative, (side1, side2) in pairs:
+                if not (side1 and side2):
+                    self._sink.tally()
+                    results[relative] = ('removed' if side1 else 'added', 1)
+        else:
+            for relative, (side1, side2) in pairs:
+                count = self._sink.count
+                status = 'changed' if side1 and side2 else 'removed' if side1 else 'added'
+                try:
+                    if side1 and side2:
+                        status = self._compareFile(relative)
+                    if status in ('added', 'removed', 'error'):
+                        self._sink.tally()
+                except self._LimitReached:
+                    results[relative] = (status, self._sink.count - count)
+                    break
+                results[relative] = (status, self._sink.count - count)
+
+        totals = collections.Counter()
+        for relative, sides in pairs:
+            if relative not in results:
+                continue
+            status, count = results[relative]
+            totals[status] += 1
+            if status != 'skipped':
+                self._sink.summary(relative, status, count)
+        self._sink.totals(totals)
+
+    def _recordKey(self, line, filename, number):
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as error:
+            raise ValueError(f'Invalid JSON Lines record at {filename}:{number}: {error}') from error
+        if not isinstance(record, dict) or self.args.key not in record:
+            self._logWarning(f'Key {self.args.key} is missing at {filename}:{number}  (skipping)')
+            return None
+        return JSONParser.dumps(record[self.args.key], sort_keys=True)
+
+    def _keyHash(self, key):
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'big')
+
+    def _readRecords(self, filename):
+        with open(filename, 'r', encoding='utf-8', buffering=self._bufferSize) as file:
+            for number, line in enumerate(file, 1):
+                line = line.strip()
+                if line:
+                    key = self._recordKey(line, filename, number)
+                    if key is not None:
+                        yield key, line
+
+    def _readBucket(self, bucket):
+        with open(bucket, 'r', encoding='utf-8', buffering=self._bufferSize) as file:
+            for entry in file:
+                key, separator, line = entry.rstrip('\n').partition('\t')
+                yield key, line
+
+    def _spill(self, records, buckets, divisor):
+        files = []
+        try:
+            for bucket in buckets:
+                files.append(open(bucket, 'w', encoding='utf-8', buffering=self._bufferSize))
+            for key, line in records:
+                files[self._keyHash(key) // divisor % len(files)].write(f'{key}\t{line}\n')
+        finally:
+            for file in files:
+                file.close()
+
+    def _compareBucket(self, bucket1, bucket2, totals):
+        records1 = {}
+        for key, line in self._readBucket(bucket1):
+            if key in records1:
+                self._logWarning(f'Duplicate key on JSON1: {self.args.key}={key}  (skipping)')
+            else:
+                records1[key] = line
+
+        keys2 = set()
+        for key, line2 in self._readBucket(bucket2):
+            if key in keys2:
+                self._logWarning(f'Duplicate key on JSON2: {self.args.key}={key}  (skipping)')
+                continue
+            keys2.add(key)
+            line1 = records1.pop(key, None)
+            if line1 == line2:
+                totals['equal'] += 1
+            else:
+                self._compareRecord(key, line1, line2, totals)
+
+        for key, line1 in records1.items():
+            self._compareRecord(key, line1, None, totals)
+
+    def _compareRecord(self, key, line1, line2, totals):
+        self._sink.section(f'{self.args.key}={key}', ('key', json.loads(key)))
+        count = self._sink.count
+        path = JSONPath()
+        object1 = json.loads(line1) if line1 is not None else None
+        object2 = json.loads(line2) if line2 is not None else None
+        status = 'added' if object1 is None else 'removed' if object2 is None else None
+        self._identicalChains.clear()
+        try:
+            self._compare(object1, object2, path, self._ignores.start(path), self._mappings.start(path))
+        finally:
+            totals[status or ('changed' if self._sink.count > count else 'equal')] += 1
+
+    def _maxBuckets(self):
+        try:
+            import resource
+            limit = resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+        except (ImportError, OSError, ValueError):
+            return self.KEYED_MAX_BUCKETS
+        if limit == resource.RLIM_INFINITY:
+            return self.KEYED_MAX_BUCKETS
+        return max(2, min(self.KEYED_MAX_BUCKETS, limit - self.KEYED_RESERVED_FILES))
+
+    def _compareKeyedFiles(self, filename1, filename2, prefix, divisor, raw, totals):
+        count = -(-os.path.getsize(filename1) * self.KEYED_MEMORY_FACTOR // self._capacity)
+        if not raw and (count <= 1 or divisor >= self.KEYED_HASH_LIMIT):
+            self._compareBucket(filename1, filename2, totals)
+            return
+
+        count = max(1, min(self._buckets, count))
+        buckets1 = [ f'{prefix}{bucket}-1.jsonl' for bucket in range(count) ]
+        buckets2 = [ f'{prefix}{bucket}-2.jsonl' for bucket in range(count) ]
+        with self._phase('partition'):
+            if raw:
+                self._spill(self._readRecords(filename1), buckets1, divisor)
+                self._spill(self._readRecords(filename2), buckets2, divisor)
+            else:
+                self._spill(self._readBucket(filename1), buckets1, divisor)
+                self._spill(self._readBucket(filename2), buckets2, divisor)
+
+        for bucket, (bucket1, bucket2) in enumerate(zip(buckets1, buckets2)):
+            self._compareKeyedFiles(bucket1, bucket2, f'{prefix}{bucket}-', divisor * count, False, totals)
+            os.remove(bucket1)
+            os.remove(bucket2)
+
+    def _compareKeyed(self):
+        budget = self.args.memory * 1024 * 1024
+        self._buckets = self._maxBuckets()
+        self._bufferSize = max(self.KEYED_MIN_BUFFER_SIZE, min(self.KEYED_BUFFER_SIZE, budget // (4 * (self._buckets + 2))))
+        self._capacity = budget - (self._buckets + 2) * self._bufferSize
+        totals = collections.Counter()
+        with tempfile.TemporaryDirectory() as directory:
+            try:
+                self._compareKeyedFiles(self.args.file1, self.args.file2, os.path.join(directory, ''), 1, True, totals)
+            except self._LimitReached:
+                pass
+        self._sink.totals(totals, 'records')
 
     def _logWarning(self, message):
-        print(f'[WARNING] {message}')
-        print()
+        self._sink.warning(message)
 
-    def _logDifference(self, path, separator, value1, value2):
-        print(f'-{path} {separator} {value1}')
-        print(f'+{path} {separator} {value2}')
-        print()
+    def _logDifference(self, path, separator, object1, object2):
+        if separator == ':':
+            value1 = '<null>' if object1 is self.MISSING else f'[{self._typetoJSON(object1)}]'
+            value2 = '<null>' if object2 is self.MISSING else f'[{self._typetoJSON(object2)}]'
+        else:
+            value1 = '<null>' if object1 is self.MISSING else JSONParser.dumps(object1)
+            value2 = '<null>' if object2 is self.MISSING else JSONParser.dumps(object2)
+        if JSONParser._stats is not None:
+            JSONParser._stats.add('differences')
+        self._sink.difference(path, separator, value1, value2, object1, object2)
 
     def _typetoJSON(self, object):
         if isinstance(object, dict):
@@ -83,77 +584,213 @@ class JSONCompare:
         elif object is None:
             return 'null'
 
-    def _findMapping(self, path):
-        for mapping, keyid in self._mappings.items():
-            if mapping.matches(path):
-                return keyid
+    def _findMapping(self, state):
+        for mapping, keyid in self._mappings.matched(state):
+            return keyid
 
-    def _ignoreElement(self, path, value1=None, value2=None):
-        for ignore, evalop in self._ignores.items():
-            if ignore.matches(path):
-                if evalop is None:
-                    return True
-                elif all([evalop is not None, value1 is not None, value2 is not None]):
-                    if evalop == '>':
-                        return value1 > value2
-                    elif evalop == '<':
-                        return value1 < value2
-                    else:
-                        raise NotImplementedError(f'The evaluation operator {evalop} is not implemented.')
+    def _ignoreElement(self, state, value1=None, value2=None):
+        for ignore, evalop in self._ignores.matched(state):
+            if evalop is None:
+                return True
+            elif all([evalop is not None, value1 is not None, value2 is not None]):
+                if evalop == '>':
+                    return value1 > value2
+                elif evalop == '<':
+                    return value1 < value2
+                else:
+                    raise NotImplementedError(f'The evaluation operator {evalop} is not implemented.')
         return False
 
-    def _compare(self, object1, object2, path):
-        if not any([ object1, object2 ]) or self._ignoreElement(path):
-            return
+    def _compare(self, object1, object2, path, ignore, mapping):
+        stack = [ (object1, object2, path, ignore, mapping) ]
+        while stack:
+            entry = stack.pop()
+            if isinstance(entry, tuple):
+                stack.extend(reversed(self._compareNode(*entry)))
+            else:
+                entry()
+
+    def _compareNode(self, object1, object2, path, ignore, mapping):
+        entries = []
+        if JSONParser._stats is not None:
+            JSONParser._stats.add('compared nodes')
+        if not any([ object1, object2 ]) or self._ignoreElement(ignore):
+            return entries
         elif object1 is None:
-            self._logDifference(path, ':', '<null>', f'[{self._typetoJSON(object2)}]')
+            self._logDifference(path, ':', self.MISSING, object2)
         elif object2 is None:
-            self._logDifference(path, ':', f'[{self._typetoJSON(object1)}]', '<null>')
+            self._logDifference(path, ':', object1, self.MISSING)
         elif type(object1) is not type(object2):
-            self._logDifference(path, ':', f'[{self._typetoJSON(object1)}]', f'[{self._typetoJSON(object2)}]')
+            self._logDifference(path, ':', object1, object2)
+        elif self._identicalSubtrees(object1, object2):
+            return entries
         elif isinstance(object1, int) or isinstance(object1, str) or isinstance(object1, bool):
-            if object1 != object2 and not self._ignoreElement(path, object1, object2):
-                self._logDifference(path, '=', JSONParser.dumps(object1), JSONParser.dumps(object2))
+            if object1 != object2 and not self._ignoreElement(ignore, object1, object2):
+                self._logDifference(path, '=', object1, object2)
         elif isinstance(object1, dict):
             keys = list(object1.keys())
-            keys.extend([ key for key in object2.keys() if key not in keys ])
+            keys.extend([ key for key in object2.keys() if key not in object1 ])
             for key in keys:
-                self._compare(object1.get(key, None), object2.get(key, None), path + key)
+                entries.append((object1.get(key, None), object2.get(key, None), path + key, self._ignores.advance(ignore, key), self._mappings.advance(mapping, key)))
         elif isinstance(object1, list):
-            #TODO: check object2 values against object1
-            for index1 in range(len(object1)):
-                value1 = object1[index1]
-                if isinstance(value1, dict):
-                    keyid = self._findMapping(path)
-                    if keyid is not None:
-                        if keyid in value1:
-                            for index2 in range(len(object2)):
-                                value2 = object2[index2]
-                                if isinstance(value2, dict):
-                                    if keyid in value2:
-                                        if value1[keyid] == value2[keyid]:
-                                            self._compare(value1, value2, path + index1)
-                                    else:
-                                        self._logWarning(f'Mapping error on JSON2: {path}={keyid}  (skipping)')
-                        else:
-                            self._logWarning(f'Mapping error on JSON1: {path}={keyid}  (skipping)')
-                    else:
-                        self._logWarning(f'Mapping is missing for: {path}  (skipping)')
-                elif isinstance(object1[index1], list):
-                    self._logWarning(f'Multidimensional arrays are not supported: {path}  (skipping)')
-                elif object1[index1] not in object2:
-                    self._logDifference(path + index1, '=', JSONParser.dumps(object1[index1]), '<null>')
+            entries.extend(self._compareArray(object1, object2, path, ignore, mapping))
         else:
             raise TypeError(f'Unexpected object type found: {type(object1)}')
+        return entries
+
+    def _identicalSubtrees(self, object1, object2):
+        if not self.args.skipidentical or not isinstance(object1, (dict, list)):
+            return False
+
+        length, chain = self._identicalChains.pop(id(object1), (None, 0))
+        if chain < self.IDENTICAL_CHAIN and len(object1) == len(object2):
+            try:
+                encoded1, encoded2 = self.ENCODER.encode(object1), self.ENCODER.encode(object2)
+            except RecursionError:
+                chain = self.IDENTICAL_CHAIN
+            else:
+                if encoded1 == encoded2:
+                    if JSONParser._stats is not None:
+                        JSONParser._stats.add('identical subtrees skipped')
+                    return True
+                chain = chain + 1 if length is None or 2 * len(encoded1) > length else 0
+                length = len(encoded1)
+
+        for value in (object1.values() if isinstance(object1, dict) else object1):
+            if isinstance(value, (dict, list)):
+                self._identicalChains[id(value)] = (length, chain)
+        return False
+
+    def _hashKey(self, object):
+        try:
+            hash(object)
+            return object
+        except TypeError:
+            return (type(object), JSONParser.dumps(object, sort_keys=True))
+
+    def _compareArray(self, object1, object2, path, ignore, mapping):
+        entries = []
+        keyid = self._findMapping(mapping)
+        child = lambda object1, object2, index: (object1, object2, path + index, self._ignores.advance(ignore, index), self._mappings.advance(mapping, index))
+
+        values2 = collections.Counter()
+        objects2 = {}
+        unmapped2 = False
+        for index2, value2 in enumerate(object2):
+            if isinstance(value2, dict):
+                if keyid is not None and keyid in value2:
+                    objects2.setdefault(self._hashKey(value2[keyid]), []).append(index2)
+                else:
+                    unmapped2 = True
+            elif not isinstance(value2, list):
+                values2[self._hashKey(value2)] += 1
+
+        values1 = collections.Counter()
+        containers1 = {}
+        keys1 = set()
+        resized = False
+        for index1, value1 in enumerate(object1):
+            if isinstance(value1, dict):
+                if keyid is None:
+                    entries.append(functools.partial(self._logWarning, f'Mapping is missing for: {path}  (skipping)'))
+                    containers1.setdefault(self._hashKey(value1), []).append(index1)
+                elif keyid not in value1:
+                    entries.append(functools.partial(self._logWarning, f'Mapping error on JSON1: {path}={keyid}  (skipping)'))
+                    containers1.setdefault(self._hashKey(value1), []).append(index1)
+                else:
+                    key = self._hashKey(value1[keyid])
+                    keys1.add(key)
+                    indexes2 = objects2.get(key)
+                    if indexes2 is None:
+                        entries.append(child(value1, None, index1))
+                        resized = True
+                    for index2 in indexes2 or []:
+                        entries.append(child(value1, object2[index2], index1))
+            elif isinstance(value1, list):
+                entries.append(functools.partial(self._logWarning, f'Multidimensional arrays are not supported: {path}  (skipping)'))
+                containers1.setdefault(self._hashKey(value1), []).append(index1)
+            else:
+                key = self._hashKey(value1)
+                values1[key] += 1
+                if values2[key] > 0:
+                    values2[key] -= 1
+                else:
+                    entries.append(functools.partial(self._logDifference, path + index1, '=', value1, self.MISSING))
+                    resized = True
+
+        if keyid is not None and unmapped2:
+            entries.append(functools.partial(self._logWarning, f'Mapping error on JSON2: {path}={keyid}  (skipping)'))
+
+        for index2, value2 in enumerate(object2):
+            if isinstance(value2, dict) and keyid is not None and keyid in value2:
+                if self._hashKey(value2[keyid]) not in keys1:
+                    entries.append(child(None, value2, index2))
+                    resized = True
+            elif isinstance(value2, (dict, list)):
+                indexes1 = containers1.get(self._hashKey(value2))
+                if indexes1:
+                    indexes1.pop(0)
+                else:
+                    entries.append(child(None, value2, index2))
+                    resized = True
+            else:
+                key = self._hashKey(value2)
+                if values1[key] > 0:
+                    values1[key] -= 1
+                else:
+                    entries.append(functools.partial(self._logDifference, path + index2, '=', self.MISSING, value2))
+                    resized = True
+
+        for index1 in sorted(itertools.chain.from_iterable(containers1.values())):
+            entries.append(child(object1[index1], None, index1))
+            resized = True
+
+        if resized and self._sink.WHOLE_ARRAYS:
+            entries = [ entry for entry in entries if isinstance(entry, functools.partial) and entry.func == self._logWarning ]
+            entries.append(functools.partial(self._logDifference, path, '=', object1, object2))
+        return entries
+
+    def _processSink(self):
+        if self.args.quiet:
+            self._sink = self._QuietSink(sys.stdout)
+        else:
+            self._sink = self.SINKS[self.args.format](sys.stdout, self.args.maxdiffs)
+
+    def _phase(self, name):
+        return self._stats.phase(name) if self._stats is not None else contextlib.nullcontext()
 
     def run(self):
-        self._loadJSONFiles()
-        self._processSelectors()
-        self._processMappings()
-        self._processIgnores()
-        self._compareJSONElements()
+        self._stats = JSONStats() if self.args.stats else None
+        with self._stats or contextlib.nullcontext():
+            if not self.directories and self.args.key is None:
+                with self._phase('load'):
+                    self._loadJSONFiles()
+                with self._phase('selectors'):
+                    self._processSelectors()
+            self._processMappings()
+            self._processIgnores()
+            self._processSink()
+            self._sink.open()
+            try:
+                with self._phase('compare'):
+                    if self.directories:
+                        self._compareDirectories()
+                    elif self.args.key is not None:
+                        self._compareKeyed()
+                    else:
+                        self._compareJSONElements()
+            except self._LimitReached:
+                pass
+            finally:
+                self._sink.close()
+
+        if self._stats is not None:
+            print(self._stats.report(), file=sys.stderr)
+        return self._sink.count
 
 
 if __name__== '__main__':
-    JSONCompare().run()
+    compare = JSONCompare()
+    count = compare.run()
+    sys.exit(1 if compare.args.quiet and count else 0)
 
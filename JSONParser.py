@@ -1,7 +1,21 @@
+import array
+import asyncio
+import bisect
+import collections
+import contextlib
+import copy
+import functools
+import hashlib
+import heapq
+import itertools
 import json
+import mmap
 import re
+import time
 
 class JSONBase(object):
+    __slots__          =   ()
+
     ROOT_SYMBOL        =   '$'
 
     CHILD              =  r'(?:(?P<child>\.(?!\.)))'
@@ -15,10 +29,391 @@ class JSONBase(object):
     ROOT_EXPRESSION    = fr'(?:(?P<root>\{ROOT_SYMBOL}))'
     CHILD_EXPRESSION   = fr'(?:(?:{CHILD}|{SEARCH}|{DEEP_SEARCH})?(?:{STRING_SIMPLE}|(?:\[(?:{STRING_COMPLEX}|{NUMBER_INDEX})\])))'
 
-    PARENT_CHILD_SPLIT = fr'^(?P<parent>.+?)(?P<child>{CHILD_EXPRESSION})$'
+    PARENT_CHILD_SPLIT = fr'^(?P<parent>.+?)(?P<current>{CHILD_EXPRESSION})$'
 
     JSON_PATH          = fr'^{ROOT_EXPRESSION}{CHILD_EXPRESSION}*$'
 
+    STEP_CHILD         =   'child'
+    STEP_INDEX         =   'index'
+    STEP_ANY           =   'any'
+    STEP_REGEX         =   'regex'
+
+    EDIT_SET           =   'set'
+    EDIT_UPDATE        =   'update'
+    EDIT_DELETE        =   'delete'
+
+    COMPILE_CACHE_SIZE =   1024
+
+    DUMP_STREAM_DEPTH  =   2
+
+    ASYNC_CONCURRENCY  =   16
+
+    _stats             =   None
+
+    STREAM_CHUNK_SIZE  =   65536
+    STREAM_WHITESPACE  =   re.compile(r'[ \t\n\r]*')
+    STREAM_STRING      =   re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+    STREAM_NUMBER      =   re.compile(r'-?(?:0|[1-9][0-9]*)(?P<float>(?:\.[0-9]+)?(?:[eE][-+]?[0-9]+)?)')
+    STREAM_DELIMITER   =   re.compile(r'[,\]} \t\n\r]')
+    STREAM_SKIP        =   re.compile(r'(?:[^"\[\]{}]+|"[^"\\]*(?:\\.[^"\\]*)*")*', re.DOTALL)
+    STREAM_LITERALS    =   { 'true': True, 'false': False, 'null': None }
+
+    LAZY_BRACKET       =   re.compile(rb'[^"\[\]{}]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"\[\]{}]*)*(?:([\[{])|[\]}])')
+    LAZY_WHITESPACE    =   re.compile(rb'[ \t\n\r]*')
+
+    class _Task(object):
+        __slots__ = ('position', 'parent', 'searched', 'hit', 'pending')
+
+        def __init__(self, position, parent, searched):
+            self.position = position
+            self.parent = parent
+            self.searched = searched
+            self.hit = False
+            self.pending = []
+
+    class _Frontier(object):
+        __slots__ = ('states', 'completes', 'single', 'searches', 'scan', 'keys', 'names', 'indexes', 'regexes', 'anys',
+                     'last', 'listSearches', 'dictSearches', 'childSearches', 'children', 'searching')
+
+        def __init__(self, states):
+            self.completes = [ elements for steps, position, elements in states if position == len(steps) ]
+            self.states = [ state for state in states if state[1] < len(state[0]) ]
+            self.single = states[0] if len(states) == 1 and self.states else None
+            self.last = [ position + 1 == len(steps) for steps, position, elements in self.states ]
+            self.searches, self.scan, self.keys, self.names, self.indexes, self.regexes, self.anys = 0, False, {}, {}, {}, [], []
+            self.listSearches, self.dictSearches, self.childSearches = [], [], []
+            for number, (steps, position, elements) in enumerate(self.states):
+                kind, key, search, deepsearch = steps[position]
+                if search or deepsearch:
+                    self.searches += 1
+                    if kind is JSONBase.STEP_CHILD or kind is JSONBase.STEP_REGEX:
+                        self.listSearches.append(number)
+                    else:
+                        self.dictSearches.append(number)
+                    if kind is JSONBase.STEP_CHILD:
+                        self.childSearches.append((number, key))
+                if kind is JSONBase.STEP_REGEX:
+                    self.scan = True
+                    self.regexes.append((number, key))
+                elif kind is JSONBase.STEP_ANY:
+                    self.scan = True
+                    self.anys.append(number)
+                else:
+                    self.keys.setdefault((kind, key), []).append(number)
+                    (self.names if kind is JSONBase.STEP_CHILD else self.indexes).setdefault(key, []).append(number)
+            self.keys = { step: tuple(numbers) for step, numbers in self.keys.items() }
+            self.names = { key: tuple(numbers) for key, numbers in self.names.items() }
+            self.indexes = { key: tuple(numbers) for key, numbers in self.indexes.items() }
+            self.anys, self.listSearches, self.dictSearches = tuple(self.anys), tuple(self.listSearches), tuple(self.dictSearches)
+            self.children = {}
+            self.searching = {}
+
+    class _Index(object):
+        __slots__ = ('nodes', 'ends', 'keys', 'arrays', 'patterns', 'stale')
+
+        def __init__(self, object, tracker):
+            self.stale = False
+            self.nodes = {}
+            self.ends = []
+            self.keys = {}
+            self.arrays = ([], [])
+            self.patterns = {}
+
+            stack = [ (object, tracker, None) ]
+            while stack:
+                object, tracker, seq = stack.pop()
+                if seq is not None:
+                    self.ends[seq] = len(self.ends) - 1
+                    continue
+                elif not isinstance(object, (dict, list)):
+                    continue
+
+                seq = len(self.ends)
+                self.ends.append(seq)
+                self.nodes[id(object)] = (object, seq)
+                stack.append((object, tracker, seq))
+
+                if isinstance(object, dict):
+                    children = []
+                    for position, (name, value) in enumerate(object.items()):
+                        trace = (tracker, name)
+                        seqs, locations = self.keys.setdefault(name, ([], []))
+                        seqs.append(seq)
+                        locations.append((seq, position, value, trace))
+                        if isinstance(value, (dict, list)):
+                            children.append((value, trace, None))
+                else:
+                    self.arrays[0].append(seq)
+                    self.arrays[1].append((seq, object, tracker))
+                    children = [ (value, (tracker, index), None) for index, value in enumerate(object) if isinstance(value, (dict, list)) ]
+
+                stack.extend(reversed(children))
+
+        def locations(self, object, kind, key):
+            if self.stale:
+                return None
+            node = self.nodes.get(id(object))
+            if node is None or node[0] is not object:
+                return None
+            first, last = node[1], self.ends[node[1]]
+
+            if kind is JSONBase.STEP_CHILD or kind is JSONBase.STEP_REGEX:
+                if kind is JSONBase.STEP_CHILD:
+                    names = [ key ] if key in self.keys else []
+                else:
+                    names = self.patterns.get(key)
+                    if names is None:
+                        names = self.patterns[key] = [ name for name in self.keys if key.fullmatch(name) ]
+                        if JSONBase._stats is not None:
+                            JSONBase._stats.add('regex evaluations', len(self.keys))
+
+                if len(names) == 1:
+                    seqs, locations = self.keys[names[0]]
+                    return seqs, locations, bisect.bisect_left(seqs, first), bisect.bisect_right(seqs, last)
+
+                slices = []
+                for name in names:
+                    seqs, locations = self.keys[name]
+                    slices.append(locations[bisect.bisect_left(seqs, first):bisect.bisect_right(seqs, last)])
+                locations = list(heapq.merge(*slices))
+
+            else:
+                seqs, arrays = self.arrays
+                locations = []
+                for seq, array, tracker in arrays[bisect.bisect_left(seqs, first):bisect.bisect_right(seqs, last)]:
+                    if kind is JSONBase.STEP_ANY:
+                        locations.extend([ (seq, index, value, (tracker, index)) for index, value in enumerate(array) ])
+                    elif key < len(array):
+                        locations.append((seq, key, array[key], (tracker, key)))
+
+            return [ location[0] for location in locations ], locations, 0, len(locations)
+
+    class _Fingerprints(object):
+        __slots__ = ('digests',)
+
+        ENCODER = json.JSONEncoder(sort_keys=True, separators=(',', ':'))
+
+        def __init__(self, object):
+            self.digests = digests = {}
+
+            nodes = [ object ] if isinstance(object, (dict, list)) else []
+            for node in nodes:
+                nodes.extend([ value for value in (node.values() if isinstance(node, dict) else node) if isinstance(value, (dict, list)) ])
+
+            for node in reversed(nodes):
+                if isinstance(node, dict):
+                    encoded = { key: [ digests[id(value)][1] ] if isinstance(value, (dict, list)) else value for key, value in node.items() }
+                else:
+                    encoded = [ [ digests[id(value)][1] ] if isinstance(value, (dict, list)) else value for value in node ]
+                digests[id(node)] = (node, self._hash(encoded))
+
+        def _hash(self, encoded):
+            return hashlib.blake2b(self.ENCODER.encode(encoded).encode(), digest_size=16).hexdigest()
+
+        def digest(self, object):
+            entry = self.digests.get(id(object))
+            if entry is not None and entry[0] is object:
+                return entry[1]
+            elif isinstance(object, (dict, list)):
+                return None
+            else:
+                return self._hash(object)
+
+    class _Structure(object):
+        __slots__ = ('map', 'opens', 'ends', 'after', 'objects')
+
+        def __init__(self, filename):
+            with open(filename, 'rb') as file:
+                self.map = data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+            self.opens = opens = array.array('q')
+            self.ends = ends = array.array('q')
+            self.after = after = array.array('q')
+            self.objects = objects = bytearray()
+
+            start = JSONBase.LAZY_WHITESPACE.match(data).end()
+            if data[start:start + 1] not in (b'[', b'{'):
+                return
+
+            stack = []
+            for match in JSONBase.LAZY_BRACKET.finditer(data):
+                offset = match.end() - 1
+                if match.lastindex is not None:
+                    stack.append(len(opens))
+                    opens.append(offset)
+                    ends.append(-1)
+                    after.append(-1)
+                    objects.append(data[offset] == 0x7b)
+                elif not stack:
+                    raise ValueError(f'Invalid JSON document: unbalanced bracket at {filename}:{offset}')
+                else:
+                    container = stack.pop()
+                    if objects[container] != (data[offset] == 0x7d):
+                        raise ValueError(f'Invalid JSON document: mismatched bracket at {filename}:{offset}')
+                    ends[container] = offset
+                    after[container] = len(opens)
+            if stack:
+                raise ValueError(f'Invalid JSON document: unclosed bracket at {filename}:{opens[stack[-1]]}')
+
+        def root(self):
+            if self.opens:
+                return self.container(0)
+            else:
+                return json.loads(self.map[:])
+
+        def container(self, container):
+            if self.objects[container]:
+                return JSONBase._LazyObject(self, container)
+            else:
+                return JSONBase._LazyArray(self, container)
+
+        def decode(self, container):
+            return json.loads(self.map[self.opens[container]:self.ends[container] + 1])
+
+        def members(self, container):
+            data, opens, ends, after = self.map, self.opens, self.ends, self.after
+            segments, children = [], []
+            cursor, end = opens[container], ends[container]
+            child, count = container + 1, len(opens)
+            while child < count and opens[child] < end:
+                segments.append(data[cursor:opens[child]])
+                segments.append(b'[]')
+                children.append(child)
+                cursor, child = ends[child] + 1, after[child]
+            segments.append(data[cursor:end + 1])
+
+            members = json.loads(b''.join(segments), object_pairs_hook=lambda pairs: pairs)
+            objects, lazyobject, lazyarray = self.objects, JSONBase._LazyObject, JSONBase._LazyArray
+            children = iter([ (lazyobject if objects[child] else lazyarray)(self, child) for child in children ])
+            if objects[container]:
+                return [ (key, next(children) if type(value) is list else value) for key, value in members ]
+            else:
+                return [ next(children) if type(value) is list else value for value in members ]
+
+    class _LazyObject(dict):
+        __slots__ = ('_structure', '_container', '_loaded')
+
+        def __init__(self, structure, container):
+            self._structure = structure
+            self._container = container
+            self._loaded = False
+
+        def _load(self):
+            if not self._loaded:
+                self._loaded = True
+                dict.update(self, self._structure.members(self._container))
+            return self
+
+        def _decode(self):
+            if self._loaded:
+                return { key: JSONBase._decoded(value) for key, value in dict.items(self) }
+            else:
+                return self._structure.decode(self._container)
+
+        def __getitem__(self, key):
+            return dict.__getitem__(self._load(), key)
+
+        def __setitem__(self, key, value):
+            dict.__setitem__(self._load(), key, value)
+
+        def __delitem__(self, key):
+            dict.__delitem__(self._load(), key)
+
+        def __contains__(self, key):
+            return dict.__contains__(self._load(), key)
+
+        def __iter__(self):
+            return dict.__iter__(self._load())
+
+        def __reversed__(self):
+            return dict.__reversed__(self._load())
+
+        def __len__(self):
+            return dict.__len__(self._load())
+
+        def __eq__(self, other):
+            return dict.__eq__(self._load(), other)
+
+        def __ne__(self, other):
+            return dict.__ne__(self._load(), other)
+
+        def __repr__(self):
+            return dict.__repr__(self._load())
+
+        def get(self, key, default=None):
+            return dict.get(self._load(), key, default)
+
+        def keys(self):
+            return dict.keys(self._load())
+
+        def values(self):
+            return dict.values(self._load())
+
+        def items(self):
+            return dict.items(self._load())
+
+    class _LazyArray(list):
+        __slots__ = ('_structure', '_container', '_loaded')
+
+        def __init__(self, structure, container):
+            self._structure = structure
+            self._container = container
+            self._loaded = False
+
+        def _load(self):
+            if not self._loaded:
+                self._loaded = True
+                list.extend(self, self._structure.members(self._container))
+            return self
+
+        def _decode(self):
+            if self._loaded:
+                return [ JSONBase._decoded(value) for value in list.__iter__(self) ]
+            else:
+                return self._structure.decode(self._container)
+
+        def __getitem__(self, index):
+            return list.__getitem__(self._load(), index)
+
+        def __setitem__(self, index, value):
+            list.__setitem__(self._load(), index, value)
+
+        def __delitem__(self, index):
+            list.__delitem__(self._load(), index)
+
+        def __contains__(self, value):
+            return list.__contains__(self._load(), value)
+
+        def __iter__(self):
+            return list.__iter__(self._load())
+
+        def __reversed__(self):
+            return list.__reversed__(self._load())
+
+        def __len__(self):
+            return list.__len__(self._load())
+
+        def __eq__(self, other):
+            return list.__eq__(self._load(), other)
+
+        def __ne__(self, other):
+            return list.__ne__(self._load(), other)
+
+        def __repr__(self):
+            return list.__repr__(self._load())
+
+        def index(self, *args):
+            return list.index(self._load(), *args)
+
+        def count(self, value):
+            return list.count(self._load(), value)
+
+    @classmethod
+    def _decoded(cls, object):
+        if isinstance(object, (cls._LazyObject, cls._LazyArray)):
+            return object._decode()
+        else:
+            return object
 
     @classmethod
     def _matchesRegEx(cls, regex, path):
@@ -70,7 +465,7 @@ class JSONBase(object):
 
     @classmethod
     def _matchGetChild(cls, match):
-        return match.group('child')
+        return match.group('current')
 
     @classmethod
     def _matchGetIndex(cls, match):
@@ -131,6 +526,14 @@ class JSONBase(object):
             pattern = re.sub(r'(?<!\\)"', '\\"', object.pattern)
             return f'{prefix}[r"{pattern}"]'
 
+    @classmethod
+    def _render(cls, tracker):
+        keys = []
+        while isinstance(tracker, tuple):
+            tracker, key = tracker
+            keys.append(key)
+        return JSONPath._unchecked(''.join([ tracker ] + [ cls._entry(key, False, False) for key in reversed(keys) ]))
+
     @classmethod
     def _parent(cls, path):
         match = cls._matchesParentChild(path)
@@ -143,128 +546,673 @@ class JSONBase(object):
     def _current(cls, path, pack):
         match = cls._matchesParentChild(path)
         if match is not None:
-            match = cls._matchesChild(cls._matchGetChild(match))
-            search = cls._matchIsSearch(match)
-            deepsearch = cls._matchIsDeepSearch(match)
-
-            if cls._matchIsIndex(match):
-                index = cls._matchGetIndex(match)
-                return cls._pack(index, search, deepsearch) if pack else index
-
-            elif cls._matchIsIndexANY(match):
-                index = -1
-                return cls._pack(index, search, deepsearch) if pack else index
-
-            elif cls._matchIsString(match):
-                string = cls._matchGetString(match)
-                return cls._pack(string, search, deepsearch) if pack else string
-
-            elif cls._matchIsRegex(match):
-                expr = cls._matchGetRegex(match)
-                try:
-                    regex = re.compile(expr)
-                except:
-                    raise ValueError(f'Invalid REGEX expression: {expr}') from None
-                return cls._pack(regex, search, deepsearch) if pack else regex
+            kind, key, search, deepsearch = cls._step(cls._matchesChild(cls._matchGetChild(match)))
+            return cls._pack(key, search, deepsearch) if pack else key
 
         else:
             return cls.ROOT_SYMBOL
 
     @classmethod
-    def _extract(cls, object, path, tracker):
-        if not path:
-            return [ JSONElement(object, tracker) ]
+    def _step(cls, match):
+        search = cls._matchIsSearch(match)
+        deepsearch = cls._matchIsDeepSearch(match)
 
-        match = cls._matchesRoot(path)
-        if match is not None:
-            return cls._extract(object, cls._matchGetRemaidingPath(match), tracker)
+        if cls._matchIsIndex(match):
+            return (cls.STEP_INDEX, cls._matchGetIndex(match), search, deepsearch)
 
-        match = cls._matchesChild(path)
-        if match is not None:
-            results = []
+        elif cls._matchIsIndexANY(match):
+            return (cls.STEP_ANY, -1, search, deepsearch)
+
+        elif cls._matchIsString(match):
+            return (cls.STEP_CHILD, cls._matchGetString(match), search, deepsearch)
+
+        elif cls._matchIsRegex(match):
+            expr = cls._matchGetRegex(match)
+            try:
+                regex = re.compile(expr)
+            except:
+                raise ValueError(f'Invalid REGEX expression: {expr}') from None
+            if JSONBase._stats is not None:
+                JSONBase._stats.add('regex compilations')
+            return (cls.STEP_REGEX, regex, search, deepsearch)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=COMPILE_CACHE_SIZE)
+    def _compile(path):
+        steps = []
+
+        match = JSONBase._matchesRoot(path)
+        if match is None:
+            raise ValueError(f'Invalid JSON path syntax: {path}')
+        remaining = JSONBase._matchGetRemaidingPath(match)
 
-            if cls._matchIsIndex(match) and isinstance(object, list):
-                index = cls._matchGetIndex(match)
-                if index < len(object):
-                    results.extend( cls._extract(object[index], cls._matchGetRemaidingPath(match), tracker + index) )
+        while remaining:
+            match = JSONBase._matchesChild(remaining)
+            if match is None:
+                raise ValueError(f'Invalid JSON path syntax: {path}')
+            steps.append(JSONBase._step(match))
+            remaining = JSONBase._matchGetRemaidingPath(match)
 
-            elif cls._matchIsIndexANY(match) and isinstance(object, list):
-                for index in range(len(object)):
-                    results.extend( cls._extract(object[index], cls._matchGetRemaidingPath(match), tracker + index) )
+        return tuple(steps)
 
-            elif cls._matchIsString(match) and isinstance(object, dict):
-                key = cls._matchGetString(match)
+    @classmethod
+    def _iextract(cls, object, path, tracker, index=None, raw=False):
+        steps = cls._compile(path)
+        if JSONBase._stats is not None:
+            JSONBase._stats._plan(path, steps)
+        return cls._iterate(object, steps, tracker, 0, index, raw)
+
+    @classmethod
+    def _iterate(cls, object, steps, tracker, position=0, index=None, raw=False):
+        length = len(steps)
+        count = 0
+        stack = [ (object, position, tracker, None) ]
+        stats = JSONBase._stats
+
+        while stack:
+            object, position, tracker, mark = stack.pop()
+
+            if mark is not None:
+                if mark == count:
+                    if stats is not None:
+                        stats.add('search expansions')
+                    stack.extend(cls._children(object, position, tracker, True))
+                continue
+
+            elif position == length:
+                count += 1
+                if stats is not None:
+                    stats.add('matches')
+                yield (object, tracker) if raw else JSONElement._traced(object, tracker, index)
+                continue
+
+            kind, key, search, deepsearch = steps[position]
+            if stats is not None:
+                stats.add('nodes')
+                started = time.perf_counter()
+
+            if index is not None and (deepsearch or search and kind is not cls.STEP_INDEX and kind is not cls.STEP_ANY) and isinstance(object, (dict, list)):
+                locations = index.locations(object, kind, key)
+                if locations is not None:
+                    if stats is not None:
+                        stats.add('index lookups')
+                        stats._time(steps, position, time.perf_counter() - started)
+                    for element in cls._iterateIndex(locations, steps, position, deepsearch, index, raw):
+                        count += 1
+                        yield element
+                    continue
+
+            if deepsearch:
+                if stats is not None:
+                    stats.add('deep search expansions')
+                stack.extend(cls._children(object, position, tracker, True))
+            elif search:
+                stack.append((object, position, tracker, count))
+
+            if kind is cls.STEP_INDEX and isinstance(object, list):
+                if key < len(object):
+                    stack.append((object[key], position + 1, (tracker, key), None))
+            elif kind is cls.STEP_ANY and isinstance(object, list):
+                stack.extend(cls._children(object, position + 1, tracker, position + 1 < length))
+            elif kind is cls.STEP_CHILD and isinstance(object, dict):
                 if key in object:
-                    results.extend( cls._extract(object[key], cls._matchGetRemaidingPath(match), tracker + key) )
+                    stack.append((object[key], position + 1, (tracker, key), None))
+            elif kind is cls.STEP_REGEX and isinstance(object, dict):
+                names = [ name for name in object if key.fullmatch(name) ]
+                stack.extend([ (object[name], position + 1, (tracker, name), None) for name in reversed(names) ])
+                if stats is not None:
+                    stats.add('regex evaluations', len(object))
 
-            elif cls._matchIsRegex(match) and isinstance(object, dict):
-                expr = cls._matchGetRegex(match)
-                try:
-                    regex = re.compile(expr)
-                except:
-                    raise ValueError(f'Invalid REGEX expression: {expr}') from None
-                for key in object:
-                    if regex.fullmatch(key):
-                        results.extend( cls._extract(object[key], cls._matchGetRemaidingPath(match), tracker + key) )
+            if stats is not None:
+                stats._time(steps, position, time.perf_counter() - started)
 
-            if (cls._matchIsSearch(match) and len(results) == 0) or cls._matchIsDeepSearch(match):
-                if isinstance(object, list):
-                    for index in range(len(object)):
-                        results.extend( cls._extract(object[index], path, tracker + index) )
-                elif isinstance(object, dict):
-                    for key in object:
-                        results.extend( cls._extract(object[key], path, tracker + key) )
+    @classmethod
+    def _iterateIndex(cls, locations, steps, position, deepsearch, index, raw=False):
+        seqs, locations, current, last = locations
+        blocked = -1
+        parent = None
+        found = False
+
+        while current < last:
+            seq, key, object, tracker = locations[current]
+            if seq != parent:
+                if found:
+                    blocked = max(blocked, index.ends[parent])
+                parent, found = seq, False
+                if not deepsearch and seq <= blocked:
+                    current = bisect.bisect_right(seqs, blocked, current, last)
+                    continue
+            current += 1
+
+            if position + 1 == len(steps):
+                found = True
+                yield (object, tracker) if raw else JSONElement._traced(object, tracker, index)
+            else:
+                for element in cls._iterate(object, steps, tracker, position + 1, index, raw):
+                    found = True
+                    yield element
+
+    @classmethod
+    def _children(cls, object, position, tracker, containers):
+        if isinstance(object, list):
+            indexes = range(len(object) - 1, -1, -1)
+        elif isinstance(object, dict):
+            indexes = reversed(object)
+        else:
+            return []
+
+        if containers:
+            return [ (object[index], position, (tracker, index), None) for index in indexes if isinstance(object[index], (dict, list)) ]
+        else:
+            return [ (object[index], position, (tracker, index), None) for index in indexes ]
 
-            return results
+    @classmethod
+    def _plans(cls, paths):
+        plans = []
+        for path in paths:
+            path = JSONPath(path)
+            plans.append(cls._compile(path))
+            if JSONBase._stats is not None:
+                JSONBase._stats._plan(path, plans[-1])
+        return plans
 
     @classmethod
-    def _matches(cls, path1, path2):
-        if not any([ path1, path2 ]):
+    def _extractMany(cls, object, plans, tracker, index=None):
+        results = [ [] for steps in plans ]
+        frontiers = {}
+        stats = JSONBase._stats
+
+        def frontier(states):
+            signature = tuple((id(elements), position) for steps, position, elements in states)
+            found = frontiers.get(signature)
+            if found is None:
+                found = frontiers[signature] = cls._Frontier(states)
+            return found
+
+        def descend(children, node, numbers, merged, trace, key, child):
+            nested = isinstance(child, (dict, list))
+            if not nested:
+                merged = ()
+            found = node.children.get((numbers, merged, nested), False)
+            if found is False:
+                states = [ (steps, position + 1, elements) for number, (steps, position, elements) in enumerate(node.states) if number in numbers and (nested or node.last[number]) ]
+                states.extend([ node.states[number] for number in merged ])
+                found = node.children[(numbers, merged, nested)] = frontier(states) if states else None
+            if found is None:
+                return
+            elif children or found.states:
+                children.append((child, (trace, key), found, None))
+            else:
+                element = JSONElement._traced(child, (trace, key), index)
+                for elements in found.completes:
+                    elements.append(element)
+                if stats is not None:
+                    stats.add('nodes')
+                    stats.add('matches', len(found.completes))
+
+        stack = [ (object, tracker, frontier([ (steps, 0, elements) for steps, elements in zip(plans, results) ]), None) ]
+        while stack:
+            value, trace, node, counts = stack.pop()
+
+            if counts is not None:
+                counts, merged = counts
+                numbers = tuple(number for number, (steps, position, elements) in enumerate(node.states) if number not in merged
+                                and (steps[position][3] or (steps[position][2] and len(elements) == counts[number])))
+                if numbers:
+                    searching = node.searching.get(numbers)
+                    if searching is None:
+                        searching = node.searching[numbers] = frontier([ node.states[number] for number in numbers ])
+                    items = value.items() if isinstance(value, dict) else enumerate(value)
+                    children = [ (child, (trace, key), searching, None) for key, child in items if isinstance(child, (dict, list)) ]
+                    children.reverse()
+                    stack.extend(children)
+                continue
+
+            if stats is not None:
+                stats.add('nodes')
+            if node.single is not None and index is not None:
+                steps, position, elements = node.single
+                elements.extend(cls._iterate(value, steps, trace, position, index))
+                continue
+
+            if node.completes:
+                element = JSONElement._traced(value, trace, index)
+                for elements in node.completes:
+                    elements.append(element)
+                if stats is not None:
+                    stats.add('matches', len(node.completes))
+
+            if not node.states:
+                continue
+            elif isinstance(value, dict):
+                merged = node.dictSearches
+                if node.childSearches:
+                    merged = tuple(sorted((*merged, *(number for number, key in node.childSearches if key not in value))))
+            elif isinstance(value, list):
+                merged = node.listSearches
+            else:
+                continue
+            if len(merged) < node.searches:
+                stack.append((value, trace, node, ([ len(elements) for steps, position, elements in node.states ], merged)))
+
+            children = []
+            if isinstance(value, dict):
+                if node.scan or merged:
+                    for key, child in value.items():
+                        numbers = node.names.get(key, ())
+                        if node.regexes:
+                            numbers = (*numbers, *(number for number, regex in node.regexes if regex.fullmatch(key) is not None))
+                        if numbers or merged:
+                            descend(children, node, numbers, merged, trace, key, child)
+                else:
+                    for (kind, key), numbers in node.keys.items():
+                        if kind is cls.STEP_CHILD and key in value:
+                            descend(children, node, numbers, (), trace, key, value[key])
+            else:
+                if node.scan or merged:
+                    for key, child in enumerate(value):
+                        numbers = node.anys + node.indexes[key] if key in node.indexes else node.anys
+                        if numbers or merged:
+                            descend(children, node, numbers, merged, trace, key, child)
+                else:
+                    for (kind, key), numbers in node.keys.items():
+                        if kind is cls.STEP_INDEX and key < len(value):
+                            descend(children, node, numbers, (), trace, key, value[key])
+            children.reverse()
+            stack.extend(children)
+        return results
+
+    @classmethod
+    def _operations(cls, kind, edits):
+        if kind is cls.EDIT_DELETE:
+            return [ (kind, path, None) for path in ([ edits ] if isinstance(edits, str) else edits) ]
+        else:
+            return [ (kind, path, argument) for path, argument in (edits.items() if isinstance(edits, dict) else edits) ]
+
+    @classmethod
+    def _edit(cls, object, tracker, operations):
+        paths, plans = [], []
+        for kind, path, argument in operations:
+            if kind not in (cls.EDIT_SET, cls.EDIT_UPDATE, cls.EDIT_DELETE):
+                raise ValueError(f'Invalid edit operation: {kind} (expected: {cls.EDIT_SET}, {cls.EDIT_UPDATE} or {cls.EDIT_DELETE})')
+            path = JSONPath(path)
+            steps = cls._compile(path)
+            paths.append(path)
+            if kind is cls.EDIT_SET and steps and steps[-1][0] is cls.STEP_CHILD and not steps[-1][2] and not steps[-1][3]:
+                plans.append((len(paths) - 1, len(paths), steps[-1][1]))
+                paths.append(path.parent())
+            else:
+                plans.append((len(paths) - 1, None, None))
+        results = cls._extractMany(object, cls._plans(paths), tracker)
+
+        containers = {}
+        def target(element):
+            trace = element._tracker
+            if trace is tracker:
+                return None, None
+            chain, parent = [], trace[0]
+            while parent is not tracker and id(parent) not in containers:
+                chain.append(parent)
+                parent = parent[0]
+            container = root if parent is tracker else containers[id(parent)]
+            try:
+                for parent in reversed(chain):
+                    container = containers[id(parent)] = container[parent[1]]
+                container[trace[1]]
+            except (KeyError, IndexError, TypeError):
+                return None
+            return container, trace[1]
+
+        def current(element):
+            location = target(element)
+            if location is None:
+                return None
+            container, key = location
+            return root if container is None else container[key]
+
+        root, deletes = object, []
+        for (kind, path, argument), (matches, parents, key) in zip(operations, plans):
+            targets = [ location for location in map(target, results[matches]) if location is not None ]
+            if kind is cls.EDIT_DELETE:
+                if (None, None) in targets:
+                    raise ValueError(f'Invalid delete operation: {path} (the root element cannot be deleted)')
+                deletes.extend(targets)
+                continue
+
+            if parents is not None:
+                created = set()
+                for container in map(current, results[parents]):
+                    if isinstance(container, dict) and key not in container and id(container) not in created:
+                        created.add(id(container))
+                        targets.append((container, key))
+
+            for count, (container, key) in enumerate(targets):
+                if kind is cls.EDIT_SET:
+                    value = argument if count == 0 else copy.deepcopy(argument)
+                else:
+                    value = argument(root if container is None else container[key])
+                if container is None:
+                    root = value
+                else:
+                    container[key] = value
+            containers.clear()
+
+        unique = { (id(container), key): (container, key) for container, key in deletes }
+        for identity, key in sorted(unique, reverse=True):
+            container, key = unique[(identity, key)]
+            del container[key]
+        return root
+
+    @classmethod
+    def _dumpChunks(cls, object, encoder, level=0):
+        if level < cls.DUMP_STREAM_DEPTH and isinstance(object, (dict, list)) and object:
+            if encoder.indent is None:
+                indent, closing = '', ''
+            else:
+                step = ' ' * encoder.indent if isinstance(encoder.indent, int) else encoder.indent
+                indent, closing = '\n' + step * (level + 1), '\n' + step * level
+
+            if isinstance(object, dict):
+                yield '{' + indent
+                items = sorted(object.items()) if encoder.sort_keys else object.items()
+                written = False
+                for key, value in items:
+                    if not isinstance(key, str):
+                        if isinstance(key, (int, float, bool)) or key is None:
+                            key = encoder.encode(key)
+                        elif encoder.skipkeys:
+                            continue
+                        else:
+                            raise TypeError(f'keys must be str, int, float, bool or None, not {type(key).__name__}')
+                    yield f'{encoder.item_separator + indent if written else ""}{encoder.encode(key)}{encoder.key_separator}'
+                    yield from cls._dumpChunks(value, encoder, level + 1)
+                    written = True
+                yield closing + '}'
+            else:
+                yield '['
+                for count, value in enumerate(object):
+                    yield f'{encoder.item_separator if count else ""}{indent}'
+                    yield from cls._dumpChunks(value, encoder, level + 1)
+                yield closing + ']'
+
+        else:
+            encoded = encoder.encode(object)
+            if encoder.indent is not None and level:
+                step = ' ' * encoder.indent if isinstance(encoder.indent, int) else encoder.indent
+                encoded = encoded.replace('\n', '\n' + step * level)
+            yield encoded
+
+    @classmethod
+    def _stepMatches(cls, step1, step2):
+        kind1, key1 = step1[0], step1[1]
+        kind2, key2 = step2[0], step2[1]
+
+        if kind1 is cls.STEP_INDEX and kind2 is cls.STEP_INDEX:
+            return key1 == key2
+
+        elif kind1 is cls.STEP_ANY and kind2 in (cls.STEP_INDEX, cls.STEP_ANY):
             return True
-        elif not all([ path1, path2 ]):
-            return False
 
-        match1 = cls._matchesRoot(path1)
-        match2 = cls._matchesRoot(path2)
-        if match1 is not None and match2 is not None:
-            return cls._matches(cls._matchGetRemaidingPath(match1), cls._matchGetRemaidingPath(match2))
+        elif kind1 is cls.STEP_CHILD and kind2 is cls.STEP_CHILD:
+            return key1 == key2
+
+        elif kind1 is cls.STEP_REGEX and kind2 is cls.STEP_CHILD:
+            return key1.fullmatch(key2) is not None
+
+        elif kind1 is cls.STEP_REGEX and kind2 is cls.STEP_REGEX:
+            return key1.pattern == key2.pattern
+
+        return False
+
+    @classmethod
+    def _matches(cls, path1, path2):
+        steps1 = cls._compile(path1)
+        states = { 0 }
+
+        for step2 in cls._compile(path2):
+            following = set()
+            for position in states:
+                if position == len(steps1):
+                    continue
+                step1 = steps1[position]
+                matched = cls._stepMatches(step1, step2)
+                if matched:
+                    following.add(position + 1)
+                if step1[3] or (step1[2] and not matched):
+                    following.add(position)
+            if not following:
+                return False
+            states = following
+
+        return len(steps1) in states
+
+    @classmethod
+    def _tokenize(cls, file, chunksize):
+        buffer, position, offset, eof = '', 0, 0, False
+        containers = []
+        expect = 'value'
+
+        while True:
+            if position == len(buffer) or buffer[position] in ' \t\n\r':
+                position = cls.STREAM_WHITESPACE.match(buffer, position).end()
+                if position == len(buffer):
+                    if eof and (containers or expect != 'next'):
+                        raise ValueError(f'Invalid JSON syntax: unexpected end of data at offset {offset + position}')
+                    elif eof:
+                        break
+                    chunk = file.read(chunksize)
+                    buffer, offset, position, eof = chunk, offset + len(buffer), 0, not chunk
+                    continue
+
+            char = buffer[position]
+            value = end = None
+
+            if (char == '{' or char == '[') and expect.startswith('value'):
+                position += 1
+                if (yield ('start_map', None) if char == '{' else ('start_array', None)):
+                    depth = 1
+                    while depth:
+                        position = cls.STREAM_SKIP.match(buffer, position).end()
+                        if position == len(buffer) or buffer[position] == '"':
+                            chunk = '' if eof else file.read(chunksize)
+                            if not chunk:
+                                raise ValueError(f'Invalid JSON syntax: unexpected end of data at offset {offset + position}')
+                            buffer, offset, position = buffer[position:] + chunk, offset + position, 0
+                        else:
+                            depth += 1 if buffer[position] in '{[' else -1
+                            position += 1
+                    expect = 'next'
+                else:
+                    containers.append(char)
+                    expect = 'key?' if char == '{' else 'value?'
+                continue
+
+            elif char == '}' and expect in ('key?', 'next') and containers and containers[-1] == '{':
+                containers.pop()
+                position += 1
+                expect = 'next'
+                yield ('end_map', None)
+                continue
+
+            elif char == ']' and expect in ('value?', 'next') and containers and containers[-1] == '[':
+                containers.pop()
+                position += 1
+                expect = 'next'
+                yield ('end_array', None)
+                continue
+
+            elif char == ',' and expect == 'next' and containers:
+                position += 1
+                expect = 'key' if containers[-1] == '{' else 'value'
+                continue
+
+            elif char == ':' and expect == 'colon':
+                position += 1
+                expect = 'value'
+                continue
+
+            elif char == '"' and expect != 'next' and expect != 'colon':
+                match = cls.STREAM_STRING.match(buffer, position + 1)
+                if match is not None:
+                    value, end = json.decoder.scanstring(buffer, position + 1)
+
+            elif char not in '{}[],:"' and expect.startswith('value'):
+                match = cls.STREAM_DELIMITER.search(buffer, position)
+                if match is not None or eof:
+                    end = match.start() if match is not None else len(buffer)
+                    token = buffer[position:end]
+                    if token in cls.STREAM_LITERALS:
+                        value = cls.STREAM_LITERALS[token]
+                    else:
+                        match = cls.STREAM_NUMBER.fullmatch(token)
+                        if match is None:
+                            raise ValueError(f'Invalid JSON syntax: unexpected {token!r} at offset {offset + position}')
+                        value = float(token) if match.group('float') else int(token)
+
+            else:
+                raise ValueError(f'Invalid JSON syntax: unexpected {char!r} at offset {offset + position}')
+
+            if end is None:
+                if eof:
+                    raise ValueError(f'Invalid JSON syntax: unexpected end of data at offset {offset + position}')
+                chunk = file.read(chunksize)
+                buffer, offset, position, eof = buffer[position:] + chunk, offset + position, 0, not chunk
+                continue
+
+            position = end
+            if expect.startswith('key'):
+                expect = 'colon'
+                yield ('map_key', value)
+            else:
+                expect = 'next'
+                yield ('value', value)
 
-        match1 = cls._matchesChild(path1)
-        match2 = cls._matchesChild(path2)
-        if match1 is not None and match2 is not None:
-            result = None
+    @classmethod
+    def _advance(cls, steps, tasks, container, key):
+        children = []
+        for task in tasks:
+            if task.position == len(steps):
+                continue
 
-            if cls._matchIsIndex(match1) and cls._matchIsIndex(match2):
-                if cls._matchGetIndex(match1) == cls._matchGetIndex(match2):
-                    result = cls._matches(cls._matchGetRemaidingPath(match1), cls._matchGetRemaidingPath(match2))
+            kind, step, search, deepsearch = steps[task.position]
 
-            elif cls._matchIsIndexANY(match1) and cls._matchIsIndex(match2):
-                result = cls._matches(cls._matchGetRemaidingPath(match1), cls._matchGetRemaidingPath(match2))
+            if container is dict:
+                if (kind is cls.STEP_CHILD and step == key) or (kind is cls.STEP_REGEX and step.fullmatch(key)):
+                    children.append(cls._Task(task.position + 1, task, False))
+            elif (kind is cls.STEP_INDEX and step == key) or kind is cls.STEP_ANY:
+                children.append(cls._Task(task.position + 1, task, False))
 
-            elif cls._matchIsIndexANY(match1) and cls._matchIsIndexANY(match2):
-                result = cls._matches(cls._matchGetRemaidingPath(match1), cls._matchGetRemaidingPath(match2))
+            if deepsearch or (search and not task.hit):
+                children.append(cls._Task(task.position, task, True))
 
-            elif cls._matchIsString(match1) and cls._matchIsString(match2):
-                if cls._matchGetString(match1) == cls._matchGetString(match2):
-                    result = cls._matches(cls._matchGetRemaidingPath(match1), cls._matchGetRemaidingPath(match2))
+        return children
 
-            elif cls._matchIsRegex(match1) and cls._matchIsString(match2):
-                expr = cls._matchGetRegex(match1)
-                try:
-                    regex = re.compile(expr)
-                except:
-                    raise ValueError(f'Invalid REGEX expression: {expr}') from None
-                if regex.fullmatch(cls._matchGetString(match2)) is not None:
-                    result = cls._matches(cls._matchGetRemaidingPath(match1), cls._matchGetRemaidingPath(match2))
+    @classmethod
+    def _propagate(cls, steps, task, element, results):
+        while task.parent is not None:
+            parent = task.parent
+            if not task.searched:
+                parent.hit = True
+                parent.pending = []
+            elif not steps[parent.position][3]:
+                if parent.hit:
+                    return
+                elif parent.pending is not None:
+                    parent.pending.append(element)
+                    return
+            task = parent
+        results.append(element)
 
-            elif cls._matchIsRegex(match1) and cls._matchIsRegex(match2):
-                if cls._matchGetRegex(match1) == cls._matchGetRegex(match2):
-                    result = cls._matches(cls._matchGetRemaidingPath(match1), cls._matchGetRemaidingPath(match2))
+    @classmethod
+    def _resolve(cls, steps, task, results):
+        pending, task.pending = task.pending, None
+        if not task.hit:
+            for element in pending:
+                cls._propagate(steps, task, element, results)
 
-            if ((result is None) and cls._matchIsSearch(match1)) or ((result != True) and cls._matchIsDeepSearch(match1)):
-                result = cls._matches(path1, cls._matchGetRemaidingPath(match2))
+    @classmethod
+    def _open(cls, steps, tasks, container):
+        for task in tasks:
+            if task.position < len(steps) and task.pending is not None:
+                kind = steps[task.position][0]
+                if (container is dict) != (kind is cls.STEP_CHILD or kind is cls.STEP_REGEX):
+                    task.pending = None
+
+    @classmethod
+    def _complete(cls, steps, tasks, object, trace, results):
+        for task in tasks:
+            if task.position == len(steps):
+                cls._propagate(steps, task, JSONElement._traced(object, trace), results)
+            elif task.pending:
+                cls._resolve(steps, task, results)
+
+            parent = task.parent
+            if parent is not None and not task.searched and parent.pending is not None:
+                kind, key, search, deepsearch = steps[parent.position]
+                if kind is cls.STEP_CHILD and search:
+                    cls._resolve(steps, parent, results)
+
+    @classmethod
+    def _stream(cls, events, steps, tracker):
+        results = []
+        frames = []
+        skip = None
+
+        while True:
+            try:
+                event, value = events.send(skip)
+            except StopIteration:
+                break
+            skip = None
+
+            if event == 'map_key':
+                frames[-1][4] = value
+                continue
+
+            elif event == 'end_map' or event == 'end_array':
+                container, tasks, trace, object, key = frames.pop()
+                cls._complete(steps, tasks, object, trace, results)
+
+            else:
+                if frames:
+                    frame = frames[-1]
+                    container, key, parent = frame[0], frame[4], frame[3]
+                    if container is list:
+                        frame[4] += 1
+                    tasks = cls._advance(steps, frame[1], container, key) if frame[1] else frame[1]
+                    trace = (frame[2], key)
+                else:
+                    container, key, parent = None, None, None
+                    tasks = [ cls._Task(0, None, False) ]
+                    trace = tracker
+
+                if event == 'value':
+                    object = value
+                elif parent is not None or any(task.position == len(steps) for task in tasks):
+                    object = {} if event == 'start_map' else []
+                elif tasks:
+                    object = None
+                else:
+                    skip = True
+                    continue
+
+                if parent is not None:
+                    if container is dict:
+                        parent[key] = object
+                    else:
+                        parent.append(object)
+
+                if event == 'value':
+                    cls._complete(steps, tasks, object, trace, results)
+                else:
+                    container = dict if event == 'start_map' else list
+                    cls._open(steps, tasks, container)
+                    frames.append([ container, tasks, trace, object, None if container is dict else 0 ])
+
+            if results:
+                yield from results
+                results.clear()
 
-            return bool(result)
 
 
 class JSONParser(JSONBase):
@@ -277,13 +1225,79 @@ class JSONParser(JSONBase):
     def loads(string, *args, **kwargs):
         return JSONElement(json.loads(string, *args, **kwargs))
 
+    @staticmethod
+    def iterload(filename, *args, **kwargs):
+        with open(filename, 'r') as file:
+            for number, line in enumerate(file, 1):
+                if line.strip():
+                    try:
+                        yield JSONElement(json.loads(line, *args, **kwargs))
+                    except json.JSONDecodeError as error:
+                        raise ValueError(f'Invalid JSON Lines record at {filename}:{number}: {error}') from error
+
+    @staticmethod
+    def _read(filename):
+        with open(filename, 'rb') as file:
+            return file.read()
+
+    @classmethod
+    def _extractBytes(cls, data, path):
+        return cls.extract(json.loads(data), path)
+
+    @classmethod
+    async def aload(cls, filename, executor=None):
+        loop = asyncio.get_running_loop()
+        data = await loop.run_in_executor(None, cls._read, filename)
+        return await loop.run_in_executor(executor, cls.loads, data)
+
+    @classmethod
+    async def _aextract(cls, filename, path, executor):
+        loop = asyncio.get_running_loop()
+        try:
+            data = await loop.run_in_executor(None, cls._read, filename)
+            return filename, await loop.run_in_executor(executor, cls._extractBytes, data, path), None
+        except Exception as error:
+            return filename, None, error
+
+    @classmethod
+    async def aextract_many(cls, filenames, path, concurrency=JSONBase.ASYNC_CONCURRENCY, executor=None):
+        if concurrency < 1:
+            raise ValueError(f'Invalid concurrency: {concurrency} (expected: 1 or more)')
+        path = JSONPath(path)
+        filenames = iter(filenames)
+        pending = set()
+        try:
+            while True:
+                for filename in itertools.islice(filenames, concurrency - len(pending)):
+                    pending.add(asyncio.ensure_future(cls._aextract(filename, path, executor)))
+                if not pending:
+                    return
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    @classmethod
+    def open(cls, filename, lazy=True):
+        if lazy:
+            return JSONElement(cls._Structure(filename).root())
+        else:
+            return cls.load(filename)
+
+    @classmethod
+    def iterextract(cls, filename, path, chunksize=JSONBase.STREAM_CHUNK_SIZE):
+        with open(filename, 'r') as file:
+            yield from cls._stream(cls._tokenize(file, chunksize), cls._compile(JSONPath(path)), JSONPath())
+
     @staticmethod
     def dump(object, filename, *args, **kwargs):
+        encoder = kwargs.pop('cls', None) or json.JSONEncoder
+        encoder = encoder(*args, **kwargs)
         with open(filename, 'w+') as file:
-            if isinstance(object, JSONElement):
-                json.dump(object.object(), file, *args, **kwargs)
-            else:
-                json.dump(object, file, *args, **kwargs)
+            for chunk in JSONBase._dumpChunks(object.object() if isinstance(object, JSONElement) else object, encoder):
+                file.write(chunk)
 
     @staticmethod
     def dumps(object, *args, **kwargs):
@@ -293,11 +1307,48 @@ class JSONParser(JSONBase):
             return json.dumps(object, *args, **kwargs)
 
     @classmethod
-    def extract(cls, object, path):
+    def iextract(cls, object, path):
+        if isinstance(object, JSONElement):
+            return cls._iextract(object._object, JSONPath(path), object._tracker, object._index)
+        else:
+            return cls._iextract(object, JSONPath(path), JSONPath())
+
+    @classmethod
+    def extract(cls, object, path, limit=None, resultset=False):
+        if resultset:
+            return JSONResultSet._collect(object, JSONPath(path), limit)
+        return list(itertools.islice(cls.iextract(object, path), limit))
+
+    @classmethod
+    def first(cls, object, path):
+        return next(cls.iextract(object, path), None)
+
+    @classmethod
+    def extract_many(cls, object, paths):
+        plans = cls._plans(paths)
+        if isinstance(object, JSONElement):
+            return cls._extractMany(object._object, plans, object._tracker, object._index)
+        else:
+            return cls._extractMany(object, plans, JSONPath())
+
+    @classmethod
+    def edit(cls, object, operations):
         if isinstance(object, JSONElement):
-            return cls._extract(object.object(), JSONPath(path), JSONPath(object.path()))
+            return object.edit(operations)
         else:
-            return cls._extract(object, JSONPath(path), JSONPath())
+            return cls._edit(object, JSONPath(), [ (kind, path, argument[0] if argument else None) for kind, path, *argument in operations ])
+
+    @classmethod
+    def set(cls, object, edits):
+        return cls.edit(object, cls._operations(cls.EDIT_SET, edits))
+
+    @classmethod
+    def update(cls, object, edits):
+        return cls.edit(object, cls._operations(cls.EDIT_UPDATE, edits))
+
+    @classmethod
+    def delete(cls, object, paths):
+        return cls.edit(object, cls._operations(cls.EDIT_DELETE, paths))
 
     @classmethod
     def matches(cls, path1, path2):
@@ -313,13 +1364,22 @@ class JSONPath(JSONBase, str):
 
         if re.match(cls.JSON_PATH, path) is None:
             raise ValueError(f'Invalid JSON path syntax: {path}')
-        else:
-            return super().__new__(cls, path)
+        elif JSONBase._stats is not None:
+            JSONBase._stats.add('paths allocated')
+        return super().__new__(cls, path)
+
+    @classmethod
+    def _unchecked(cls, path):
+        if JSONBase._stats is not None:
+            JSONBase._stats.add('paths allocated')
+        return str.__new__(cls, path)
 
     def __add__(self, object):
         object, search, deepsearch = self._unpack(object)
         if not isinstance(object, (tuple, str, int, re.Pattern)):
             raise TypeError(f'Invalid JSON key type: {type(object).__name__} (expected: {tuple.__name__}, {str.__name__}, {int.__name__} or {re.Pattern.__name__})')
+        elif isinstance(object, str) or type(object) is int:
+            return self._unchecked(str(self) + self._entry(object, search, deepsearch))
         else:
             return JSONPath(str(self) + self._entry(object, search, deepsearch))
 
@@ -340,51 +1400,360 @@ class JSONPath(JSONBase, str):
     def current(self, pack=False):
         return self._current(self, pack)
 
-    def extract(self, object):
+    def iextract(self, object):
         if isinstance(object, JSONElement):
-            return self._extract(object.object(), self, object.path())
+            return self._iextract(object._object, self, object._tracker, object._index)
         else:
-            return self._extract(object, self, JSONPath())
+            return self._iextract(object, self, JSONPath())
+
+    def extract(self, object, limit=None, resultset=False):
+        if resultset:
+            return JSONResultSet._collect(object, self, limit)
+        return list(itertools.islice(self.iextract(object), limit))
+
+    def first(self, object):
+        return next(self.iextract(object), None)
 
     def matches(self, path):
         return self._matches(self, JSONPath(path))
 
+    def explain(self, object):
+        with JSONStats() as stats:
+            self.extract(object)
+        return stats.report()
+
+
+class JSONPathSet(JSONBase):
+    TRANSITIONS_CACHE_SIZE = 1024
+
+    class _State(object):
+        __slots__ = ('positions', 'transitions', 'matched', 'names', 'indexes', 'regexes')
+
+        def __init__(self, positions, matched, names, indexes, regexes):
+            self.positions = positions
+            self.transitions = {}
+            self.matched = matched
+            self.names = names
+            self.indexes = indexes
+            self.regexes = regexes
+
+    def __init__(self, paths=None):
+        self._paths = []
+        self._values = []
+        self._plans = []
+        self._states = {}
+        if isinstance(paths, dict):
+            for path, value in paths.items():
+                self.add(path, value)
+        elif paths is not None:
+            for path in paths:
+                self.add(path)
+
+    def _state(self, positions):
+        state = self._states.get(positions)
+        if state is None:
+            matched = [ (self._paths[pattern], self._values[pattern]) for pattern, position in sorted(positions) if position == len(self._plans[pattern]) ]
+            pending = [ self._plans[pattern][position] for pattern, position in positions if position < len(self._plans[pattern]) ]
+            names = frozenset(key for kind, key, search, deepsearch in pending if kind is self.STEP_CHILD)
+            indexes = frozenset(key for kind, key, search, deepsearch in pending if kind is self.STEP_INDEX)
+            regexes = tuple({ key.pattern: key for kind, key, search, deepsearch in pending if kind is self.STEP_REGEX }.values())
+            state = self._states[positions] = self._State(positions, matched, names, indexes, regexes)
+        return state
+
+    def _transition(self, state, matches):
+        positions = set()
+        for pattern, position in state.positions:
+            steps = self._plans[pattern]
+            if position == len(steps):
+                continue
+            matched = matches(steps[position])
+            if matched:
+                positions.add((pattern, position + 1))
+            if steps[position][3] or (steps[position][2] and not matched):
+                positions.add((pattern, position))
+        return self._state(frozenset(positions))
+
+    def _follow(self, state, step):
+        following = state.transitions.get(step)
+        if following is None:
+            if len(state.transitions) >= self.TRANSITIONS_CACHE_SIZE:
+                state.transitions.clear()
+            following = state.transitions[step] = self._transition(state, lambda expected: self._stepMatches(expected, step))
+        return following
+
+    def _child(self, state, key):
+        if key in state.names:
+            return self._follow(state, (self.STEP_CHILD, key, False, False))
+        outcome = (self.STEP_REGEX, tuple(regex.fullmatch(key) is not None for regex in state.regexes))
+        following = state.transitions.get(outcome)
+        if following is None:
+            patterns = { regex.pattern for regex, matched in zip(state.regexes, outcome[1]) if matched }
+            following = state.transitions[outcome] = self._transition(state, lambda expected: expected[0] is self.STEP_REGEX and expected[1].pattern in patterns)
+        return following
+
+    def _index(self, state, key):
+        if key in state.indexes:
+            return self._follow(state, (self.STEP_INDEX, key, False, False))
+        return self._follow(state, (self.STEP_ANY, None, False, False))
+
+    def add(self, path, value=None):
+        path = JSONPath(path)
+        self._paths.append(path)
+        self._values.append(value)
+        self._plans.append(self._compile(path))
+        self._states = {}
+
+    def paths(self):
+        return list(self._paths)
+
+    def start(self, path=None):
+        state = self._state(frozenset((pattern, 0) for pattern in range(len(self._plans))))
+        for step in self._compile(JSONPath(path)):
+            if step[0] is self.STEP_CHILD and not step[2] and not step[3]:
+                state = self._child(state, step[1])
+            elif step[0] is self.STEP_INDEX and not step[2] and not step[3]:
+                state = self._index(state, step[1])
+            else:
+                state = self._follow(state, step)
+        return state
+
+    def advance(self, state, key):
+        if not state.positions:
+            return state
+        elif isinstance(key, str):
+            if re.fullmatch(self.STRING_SIMPLE, key) is None:
+                key = json.dumps(key)[1:-1]
+            return self._child(state, key)
+        else:
+            return self._index(state, key)
+
+    def matched(self, state):
+        return state.matched
+
+    def matches(self, path):
+        return self.start(path).matched
+
+    def __len__(self):
+        return len(self._paths)
+
+
+class JSONStats(JSONBase):
+    COUNTERS = ('nodes', 'matches', 'search expansions', 'deep search expansions', 'index lookups', 'regex compilations', 'regex evaluations', 'paths allocated')
+
+    def __init__(self):
+        self.counters = collections.Counter({ name: 0 for name in self.COUNTERS })
+        self.phases = {}
+        self.plans = {}
+        self.steps = {}
+        self.seconds = 0.0
+        self._previous = None
+        self._started = None
+
+    def __enter__(self):
+        self._previous, JSONBase._stats = JSONBase._stats, self
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exception):
+        self.seconds += time.perf_counter() - self._started
+        JSONBase._stats, self._previous = self._previous, None
+        return False
+
+    def _plan(self, path, steps):
+        self.plans.setdefault(steps, path)
+
+    def _time(self, steps, position, seconds):
+        entry = self.steps.get((steps, position))
+        if entry is None:
+            entry = self.steps[(steps, position)] = [ 0, 0.0 ]
+        entry[0] += 1
+        entry[1] += seconds
+
+    def _fragments(self, path):
+        fragments = []
+        remaining = self._matchGetRemaidingPath(self._matchesRoot(path))
+        while remaining:
+            following = self._matchGetRemaidingPath(self._matchesChild(remaining))
+            fragments.append(remaining[:len(remaining) - len(following)])
+            remaining = following
+        return fragments
+
+    def add(self, name, count=1):
+        self.counters[name] += count
+
+    def merge(self, counters):
+        self.counters.update(counters)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - started
+
+    def report(self):
+        lines = [ f'{"elapsed":<28} {self.seconds * 1000:>12.3f} ms' ]
+        lines.extend([ f'  {name:<26} {seconds * 1000:>12.3f} ms' for name, seconds in self.phases.items() ])
+        lines.extend([ f'{name:<28} {count:>12}' for name, count in self.counters.items() ])
+        for steps, path in self.plans.items():
+            if not any((steps, position) in self.steps for position in range(len(steps))):
+                continue
+            lines.append('')
+            lines.append(f'plan {path}')
+            lines.append(f'  {"step":<24} {"visits":>12} {"time":>12}')
+            for position, fragment in enumerate(self._fragments(path)):
+                visits, seconds = self.steps.get((steps, position), (0, 0.0))
+                lines.append(f'  {fragment:<24} {visits:>12} {seconds * 1000:>9.3f} ms')
+        return '\n'.join(lines)
+
+
+class JSONResultSet(JSONBase):
+    __slots__ = ('_values', '_traces', '_index')
+
+    def __init__(self, pairs=(), index=None):
+        self._values = values = []
+        self._traces = traces = []
+        self._index = index
+        for value, trace in pairs:
+            values.append(value)
+            traces.append(trace)
+
+    @classmethod
+    def _collect(cls, object, path, limit):
+        if isinstance(object, JSONElement):
+            object, tracker, index = object._object, object._tracker, object._index
+        else:
+            tracker, index = JSONPath(), None
+        return cls(itertools.islice(cls._iextract(object, path, tracker, index, raw=True), limit), index)
+
+    def _numbers(self, skip):
+        if skip:
+            return [ value for value in self._values if type(value) is int or type(value) is float ]
+        else:
+            return self._values
+
+    def values(self):
+        return self._values
+
+    def paths(self):
+        return [ trace if isinstance(trace, JSONPath) else self._render(trace) for trace in self._traces ]
+
+    def array(self, typecode='d', skip=False):
+        return array.array(typecode, self._numbers(skip))
+
+    def numpy(self, dtype='float64', skip=False):
+        try:
+            import numpy
+        except ImportError as error:
+            raise ImportError(f'{JSONResultSet.__name__}.numpy() requires the numpy package') from error
+        values = self._numbers(skip)
+        return numpy.fromiter(values, dtype=dtype, count=len(values))
+
+    def __len__(self):
+        return len(self._values)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return JSONResultSet(zip(self._values[position], self._traces[position]), self._index)
+        return JSONElement._traced(self._values[position], self._traces[position], self._index)
+
+    def __iter__(self):
+        for value, trace in zip(self._values, self._traces):
+            yield JSONElement._traced(value, trace, self._index)
+
 
 class JSONElement(JSONBase):
+    __slots__ = ('_object', '_path', '_tracker', '_index')
+
     def __init__(self, object, path=None):
-        if object is not None and not isinstance(object, (JSONElement, dict, list, str, int, bool)):
-            raise TypeError(f'Invalid JSON object type: {type(object).__name__} (expected: {JSONElement.__name__}, {dict.__name__}, {list.__name__}, {str.__name__}, {int.__name__}, {bool.__name__} or None)')
+        if object is not None and not isinstance(object, (JSONElement, dict, list, str, int, float, bool)):
+            raise TypeError(f'Invalid JSON object type: {type(object).__name__} (expected: {JSONElement.__name__}, {dict.__name__}, {list.__name__}, {str.__name__}, {int.__name__}, {float.__name__}, {bool.__name__} or None)')
         elif isinstance(object, JSONElement):
-            self._object = object.object()
-            self._path = JSONPath(path or object.path())
+            self._object = object._object
+            if path:
+                self._path = self._tracker = JSONPath(path)
+                self._index = None
+            else:
+                self._path, self._tracker, self._index = object._path, object._tracker, object._index
         else:
             self._object = object
-            self._path = JSONPath(path)
+            self._path = self._tracker = JSONPath(path)
+            self._index = None
+
+    @classmethod
+    def _traced(cls, object, tracker, index=None):
+        element = cls.__new__(cls)
+        element._object = object
+        element._path = None if isinstance(tracker, tuple) else tracker
+        element._tracker = tracker
+        element._index = index
+        return element
 
     def path(self):
+        if self._path is None:
+            self._path = self._render(self._tracker)
         return self._path
 
     def object(self):
-        return self._object
+        return self._decoded(self._object)
 
     def key(self):
-        return self._path.current()
+        if isinstance(self._tracker, tuple):
+            key = self._tracker[1]
+            if isinstance(key, int) or json.dumps(key)[1:-1] == key:
+                return key
+        return self.path().current()
 
     def value(self):
-        return self._object
+        return self._decoded(self._object)
+
+    def index(self):
+        self._index = self._Index(self._object, self._tracker)
+        return self
+
+    def fingerprint(self):
+        return self._Fingerprints(self._object).digest(self._object)
+
+    def iextract(self, path):
+        return self._iextract(self._object, JSONPath(path), self._tracker, self._index)
+
+    def extract(self, path, limit=None, resultset=False):
+        if resultset:
+            return JSONResultSet._collect(self, JSONPath(path), limit)
+        return list(itertools.islice(self.iextract(path), limit))
+
+    def first(self, path):
+        return next(self.iextract(path), None)
+
+    def extract_many(self, paths):
+        return self._extractMany(self._object, self._plans(paths), self._tracker, self._index)
+
+    def edit(self, operations):
+        self._object = self._edit(self._object, self._tracker, [ (kind, path, argument[0] if argument else None) for kind, path, *argument in operations ])
+        if self._index is not None:
+            self._index.stale = True
+            self._index = None
+        return self
+
+    def set(self, edits):
+        return self.edit(self._operations(self.EDIT_SET, edits))
+
+    def update(self, edits):
+        return self.edit(self._operations(self.EDIT_UPDATE, edits))
 
-    def extract(self, path):
-        return self._extract(self._object, JSONPath(path), self._path)
+    def delete(self, paths):
+        return self.edit(self._operations(self.EDIT_DELETE, paths))
 
     def matches(self, path):
-        return self._matches(self._path, JSONPath(path))
+        return self._matches(self.path(), JSONPath(path))
 
     def json(self):
-        return json.dumps(self._object, indent=4)
+        return json.dumps(self.object(), indent=4)
 
     def __str__(self):
-        return f'{self._path}\n{self.json()}'
+        return f'{self.path()}\n{self.json()}'
 
 
-__all__ = ['JSONParser', 'JSONPath', 'JSONElement']
+__all__ = ['JSONParser', 'JSONPath', 'JSONPathSet', 'JSONStats', 'JSONResultSet', 'JSONElement']
 
@@ -1,20 +1,227 @@
 #!/usr/bin/python3 -B
 
 import argparse
+import collections
+import concurrent.futures
+import contextlib
+import functools
+import itertools
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
 
-from JSONParser import JSONParser
+from JSONParser import JSONParser, JSONPath, JSONStats
 
 class JSONSelector:
+    CHUNK_SIZE         = 1024
+    CHUNKS_PER_WORKER  = 2
+
+    SERVER_BUFFER_SIZE = 65536
+    SELECTOR_CACHE     = 1024
+
+    LOOPBACK_HOSTS     = { 'localhost': socket.AF_INET, '127.0.0.1': socket.AF_INET, '::1': socket.AF_INET6 }
+
+    class _DocumentCache(object):
+        def __init__(self, capacity):
+            self.capacity = capacity
+            self.size = 0
+            self.entries = collections.OrderedDict()
+            self.lock = threading.Lock()
+
+        def _evict(self, key):
+            entry = self.entries.pop(key, None)
+            if entry is not None:
+                self.size -= entry[1]
+
+        def get(self, filename, jsonl):
+            key = (os.path.realpath(filename), jsonl)
+            status = os.stat(key[0])
+            with self.lock:
+                entry = self.entries.get(key)
+                if entry is not None and entry[:2] == (status.st_mtime_ns, status.st_size):
+                    self.entries.move_to_end(key)
+                    return entry[2]
+
+            document = list(JSONParser.iterload(filename)) if jsonl else JSONParser.load(filename)
+
+            with self.lock:
+                self._evict(key)
+                if status.st_size <= self.capacity:
+                    self.entries[key] = (status.st_mtime_ns, status.st_size, document)
+                    self.size += status.st_size
+                    while self.size > self.capacity:
+                        self._evict(next(iter(self.entries)))
+            return document
+
+    class _Handler(socketserver.StreamRequestHandler):
+        wbufsize = 65536
+
+        def handle(self):
+            try:
+                request = json.loads(self.rfile.readline())
+                selector = self.server.selector._selector(request['selector'])
+                document = self.server.cache.get(request['filename'], bool(request.get('jsonl')))
+            except (OSError, ValueError, KeyError, TypeError) as error:
+                self._send({ 'status': 'error', 'message': f'{type(error).__name__}: {error}' })
+                return
+
+            self._send({ 'status': 'ok' })
+            for record in document if isinstance(document, list) else [ document ]:
+                for element in record.iextract(selector):
+                    self.wfile.write(f'{element}\n\n'.encode())
+
+        def _send(self, header):
+            self.wfile.write(JSONParser.dumps(header).encode() + b'\n')
+
+    class _TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+        daemon_threads = True
+        allow_reuse_address = True
+
+    class _TCP6Server(_TCPServer):
+        address_family = socket.AF_INET6
+
+    if hasattr(socketserver, 'UnixStreamServer'):
+        class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+            daemon_threads = True
+
     def __init__(self):
         parser = argparse.ArgumentParser()
-        parser.add_argument('filename', metavar='FILE', action='store', help='JSON filename')
-        parser.add_argument('selector', metavar='SELECTOR', action='store', help='JSONPath selector')
+        parser.add_argument('filename', metavar='FILE', nargs='?', action='store', help='JSON filename')
+        parser.add_argument('selector', metavar='SELECTOR', nargs='?', action='store', help='JSONPath selector')
+        parser.add_argument('--jsonl', dest='jsonl', action='store_true', help='Read FILE as JSON Lines, selecting from each record')
+        parser.add_argument('-w', '--workers', dest='workers', metavar='N', type=int, default=1, help='Number of processes used to select from JSON Lines records (default: 1)')
+        parser.add_argument('--serve', dest='serve', metavar='ADDRESS', help='Serve requests on a Unix socket path or a loopback TCP [HOST:]PORT (HOST: localhost, 127.0.0.1 or ::1)')
+        parser.add_argument('--connect', dest='connect', metavar='ADDRESS', help='Send the request to a server started with --serve')
+        parser.add_argument('--stats', dest='stats', action='store_true', help='Print evaluation statistics to stderr')
+        parser.add_argument('--cache-size', dest='cachesize', metavar='MB', type=int, default=1024, help='Total size of the files kept loaded by --serve (default: 1024)')
         self.args = parser.parse_args()
+        if not self.args.serve and (self.args.filename is None or self.args.selector is None):
+            parser.error('the following arguments are required: FILE, SELECTOR')
+
+    @staticmethod
+    @functools.lru_cache(maxsize=SELECTOR_CACHE)
+    def _selector(selector):
+        return JSONPath(selector)
+
+    @staticmethod
+    def _selectChunk(selector, filename, number, lines, stats=False):
+        outputs = []
+        with JSONStats() if stats else contextlib.nullcontext() as collector:
+            for offset, line in enumerate(lines):
+                if line.strip():
+                    try:
+                        record = JSONParser.loads(line)
+                    except json.JSONDecodeError as error:
+                        raise ValueError(f'Invalid JSON Lines record at {filename}:{number + offset}: {error}') from error
+                    outputs.extend(f'{element}\n\n' for element in record.extract(selector))
+        return ''.join(outputs), collector.counters if stats else None
+
+    def _chunks(self, file):
+        number = 1
+        while True:
+            lines = list(itertools.islice(file, self.CHUNK_SIZE))
+            if not lines:
+                return
+            yield number, lines
+            number += len(lines)
+
+    def _selectLines(self, selector, stats):
+        with open(self.args.filename, 'r') as file, concurrent.futures.ProcessPoolExecutor(max_workers=self.args.workers) as executor:
+            pending = collections.deque()
+            for number, lines in self._chunks(file):
+                pending.append(executor.submit(self._selectChunk, selector, self.args.filename, number, lines, stats is not None))
+                while pending and (len(pending) >= self.args.workers * self.CHUNKS_PER_WORKER or pending[0].done()):
+                    self._writeChunk(pending.popleft().result(), stats)
+            while pending:
+                self._writeChunk(pending.popleft().result(), stats)
+
+    def _writeChunk(self, result, stats):
+        output, counters = result
+        sys.stdout.write(output)
+        if stats is not None:
+            stats.merge(counters)
+
+    def _address(self, address):
+        host, separator, port = address.rpartition(':')
+        if port.isdigit():
+            host = host.strip('[]') or 'localhost'
+            if host not in self.LOOPBACK_HOSTS:
+                raise ValueError(f'Invalid server host: {host} (expected: {", ".join(self.LOOPBACK_HOSTS)})')
+            return self.LOOPBACK_HOSTS[host], (host, int(port))
+        elif hasattr(socket, 'AF_UNIX'):
+            return socket.AF_UNIX, address
+        else:
+            raise ValueError(f'Invalid server address: {address} (expected: [HOST:]PORT)')
+
+    def _serve(self):
+        family, address = self._address(self.args.serve)
+        if family == socket.AF_INET:
+            server = self._TCPServer(address, self._Handler)
+        elif family == socket.AF_INET6:
+            server = self._TCP6Server(address, self._Handler)
+        else:
+            if os.path.exists(address):
+                os.unlink(address)
+            server = self._UnixServer(address, self._Handler)
+        server.selector = self
+        server.cache = self._DocumentCache(self.args.cachesize * 1024 * 1024)
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            if family not in (socket.AF_INET, socket.AF_INET6):
+                os.unlink(address)
+
+    def _connect(self):
+        family, address = self._address(self.args.connect)
+        filename = os.path.abspath(self.args.filename)
+        with socket.socket(family, socket.SOCK_STREAM) as connection:
+            connection.connect(address)
+            with connection.makefile('rwb', buffering=self.SERVER_BUFFER_SIZE) as stream:
+                stream.write(JSONParser.dumps({ 'filename': filename, 'selector': self.args.selector, 'jsonl': self.args.jsonl }).encode() + b'\n')
+                stream.flush()
+                header = json.loads(stream.readline() or '{}')
+                if header.get('status') != 'ok':
+                    sys.exit(f'{sys.argv[0]}: error: {header.get("message", "connection closed by the server")}')
+                for block in iter(functools.partial(stream.read1, self.SERVER_BUFFER_SIZE), b''):
+                    sys.stdout.buffer.write(block)
+        sys.stdout.flush()
 
     def run(self):
-        for element in JSONParser.load(self.args.filename).extract(self.args.selector):
-            print(element)
-            print()
+        if self.args.serve:
+            self._serve()
+            return
+        elif self.args.connect:
+            self._connect()
+            return
+
+        stats = JSONStats() if self.args.stats else None
+        with stats or contextlib.nullcontext():
+            self._select(JSONPath(self.args.selector), stats)
+        if stats is not None:
+            print(stats.report(), file=sys.stderr)
+
+    def _select(self, selector, stats):
+        if not self.args.jsonl:
+            with stats.phase('load') if stats else contextlib.nullcontext():
+                document = JSONParser.load(self.args.filename)
+            with stats.phase('extract') if stats else contextlib.nullcontext():
+                for element in document.iextract(selector):
+                    print(element)
+                    print()
+        elif self.args.workers > 1:
+            self._selectLines(selector, stats)
+        else:
+            for record in JSONParser.iterload(self.args.filename):
+                for element in record.extract(selector):
+                    print(element)
+                    print()
 
 if __name__== '__main__':
     JSONSelector().run()
@@ -0,0 +1,4 @@
+from .generators import DocumentGenerator
+from .scenarios import Scenario, Scenarios
+
+__all__ = ['DocumentGenerator', 'Scenario', 'Scenarios']
@@ -0,0 +1,96 @@
+import argparse
+import fnmatch
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from .scenarios import Scenarios
+
+class JSONBenchmark:
+    BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+    def __init__(self):
+        parser = argparse.ArgumentParser(prog='python -m benchmarks')
+        parser.add_argument('patterns', metavar='SCENARIO', nargs='*', help='Glob patterns of the scenarios to run (default: all)')
+        parser.add_argument('-r', '--repeat', dest='repeat', metavar='N', type=int, default=3, help='Number of timed runs, the fastest is reported (default: 3)')
+        parser.add_argument('--seed', dest='seed', metavar='N', type=int, default=0, help='Seed of the document generators (default: 0)')
+        parser.add_argument('-b', '--baseline', dest='baseline', metavar='FILE', default=self.BASELINE, help='Baseline results to compare against (default: benchmarks/baseline.json)')
+        parser.add_argument('--save', dest='save', action='store_true', help='Store the results as the new baseline')
+        parser.add_argument('-t', '--tolerance', dest='tolerance', metavar='PERCENT', type=float, default=25.0, help='Slowdown reported as a regression (default: 25)')
+        parser.add_argument('--no-memory', dest='memory', action='store_false', help='Skip the traced run that measures peak memory')
+        self.args = parser.parse_args()
+
+    def _loadBaseline(self):
+        if self.args.save or not os.path.exists(self.args.baseline):
+            return {}
+        with open(self.args.baseline, 'r') as file:
+            baseline = json.load(file)
+        if baseline.get('seed') != self.args.seed:
+            print(f'[WARNING] Baseline was generated with seed {baseline.get("seed")}  (ignoring)', file=sys.stderr)
+            return {}
+        return baseline['scenarios']
+
+    def _saveBaseline(self, results):
+        with open(self.args.baseline, 'w') as file:
+            json.dump({ 'seed': self.args.seed, 'python': sys.version.split()[0], 'scenarios': results }, file, indent=4, sort_keys=True)
+            file.write('\n')
+
+    def _measure(self, scenario):
+        units, run = scenario.setup()
+        run()
+
+        seconds = None
+        for _ in range(self.args.repeat):
+            gc.collect()
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+            seconds = elapsed if seconds is None else min(seconds, elapsed)
+
+        peak = None
+        if self.args.memory:
+            gc.collect()
+            tracemalloc.start()
+            try:
+                run()
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        return { 'seconds': seconds, 'throughput': units / seconds, 'unit': scenario.unit, 'peak': peak }
+
+    def _report(self, name, result, reference):
+        peak = '-' if result['peak'] is None else f'{result["peak"] / 1024 / 1024:.1f} MiB'
+        line = f'{name:<20} {result["seconds"] * 1000:>10.1f} ms {result["throughput"]:>14,.0f} {result["unit"] + "/s":<10} {peak:>11}'
+        if reference is None:
+            print(line)
+            return False
+        change = (result['seconds'] / reference['seconds'] - 1) * 100
+        regressed = change > self.args.tolerance
+        print(f'{line} {change:>+8.1f}%{"  REGRESSION" if regressed else ""}')
+        return regressed
+
+    def run(self):
+        baseline = self._loadBaseline()
+        results = {}
+        regressions = []
+
+        with tempfile.TemporaryDirectory() as directory:
+            for scenario in Scenarios(self.args.seed, directory).all():
+                if self.args.patterns and not any(fnmatch.fnmatchcase(scenario.name, pattern) for pattern in self.args.patterns):
+                    continue
+                results[scenario.name] = result = self._measure(scenario)
+                if self._report(scenario.name, result, baseline.get(scenario.name)):
+                    regressions.append(scenario.name)
+
+        if self.args.save:
+            self._saveBaseline(results)
+        return 1 if regressions else 0
+
+
+if __name__== '__main__':
+    sys.exit(JSONBenchmark().run())
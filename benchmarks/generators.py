@@ -0,0 +1,68 @@
+import random
+import string
+
+class DocumentGenerator(object):
+    NAMES = ('alpha', 'bravo', 'charlie', 'delta', 'echo', 'foxtrot', 'golf', 'hotel')
+
+    def __init__(self, seed=0):
+        self.random = random.Random(seed)
+
+    def _word(self, length=8):
+        return ''.join(self.random.choice(string.ascii_lowercase) for _ in range(length))
+
+    def _scalar(self):
+        choice = self.random.random()
+        if choice < 0.4:
+            return self.random.randint(0, 1000000)
+        elif choice < 0.8:
+            return self._word()
+        elif choice < 0.9:
+            return self.random.random() < 0.5
+        else:
+            return None
+
+    def _record(self, id):
+        return {
+            'id': id,
+            'name': self.random.choice(self.NAMES),
+            'value': self.random.randint(0, 1000),
+            'ts': self.random.randint(1600000000, 1700000000),
+            'tags': [ self._word(4) for _ in range(self.random.randint(0, 4)) ],
+        }
+
+    def wide(self, width=2000, depth=3):
+        if depth == 0:
+            return self._scalar()
+        return { f'k{index}': self.wide(max(1, width // 40), depth - 1) if index % 10 == 0 else self._record(index) for index in range(width) }
+
+    def deep(self, depth=2000):
+        document = { 'name': 'leaf', 'value': self._scalar() }
+        for level in range(depth):
+            document = { 'name': f'level{level}', 'child': document, 'items': [ level, self._scalar() ] }
+        return document
+
+    def arrays(self, count=20000):
+        return { 'items': [ self._record(id) for id in range(count) ], 'matrix': [ [ self._scalar() for _ in range(10) ] for _ in range(count // 10) ] }
+
+    def regexKeys(self, count=20000):
+        return { f'key_{index:05d}_{self._word(3)}': self._scalar() for index in range(count) }
+
+    def mutate(self, document, rate=0.01):
+        if isinstance(document, dict):
+            mutated = {}
+            for key, value in document.items():
+                if self.random.random() < rate:
+                    continue
+                mutated[key] = self.mutate(value, rate)
+            if self.random.random() < rate:
+                mutated[self._word()] = self._scalar()
+            return mutated
+        elif isinstance(document, list):
+            mutated = [ self.mutate(value, rate) for value in document if self.random.random() >= rate ]
+            if self.random.random() < rate:
+                mutated.append(self._scalar())
+            return mutated
+        elif self.random.random() < rate:
+            return self._scalar()
+        else:
+            return document
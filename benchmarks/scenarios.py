@@ -0,0 +1,147 @@
+import contextlib
+import io
+import json
+import os
+import sys
+
+from JSONParser import JSONParser, JSONPath, JSONElement
+from JSONCompare import JSONCompare
+
+from .generators import DocumentGenerator
+
+class Scenario(object):
+    __slots__ = ('name', 'unit', 'setup')
+
+    def __init__(self, name, unit, setup):
+        self.name = name
+        self.unit = unit
+        self.setup = setup
+
+class Scenarios(object):
+    def __init__(self, seed, directory):
+        self.seed = seed
+        self.directory = directory
+        self.documents = {}
+
+    def _document(self, kind):
+        document = self.documents.get(kind)
+        if document is None:
+            generator = DocumentGenerator(self.seed)
+            document = self.documents[kind] = getattr(generator, kind)()
+        return document
+
+    def _nodes(self, object):
+        count, stack = 0, [ object ]
+        while stack:
+            object = stack.pop()
+            count += 1
+            if isinstance(object, dict):
+                stack.extend(object.values())
+            elif isinstance(object, list):
+                stack.extend(object)
+        return count
+
+    def _file(self, name, object):
+        filename = os.path.join(self.directory, name)
+        if not os.path.exists(filename):
+            with open(filename, 'w') as file:
+                json.dump(object, file)
+        return filename
+
+    def _extract(self, kind, path, indexed=False, repeat=1, resultset=False):
+        def setup():
+            element = JSONElement(self._document(kind))
+            if indexed:
+                element.index()
+            selector = JSONPath(path)
+            def run():
+                for _ in range(repeat):
+                    element.extract(selector, resultset=resultset)
+            return self._nodes(element.object()) * repeat, run
+        return setup
+
+    def _lookups(self, kind, path, count):
+        def setup():
+            element = JSONElement(self._document(kind))
+            selector = JSONPath(path)
+            def run():
+                for _ in range(count):
+                    element.first(selector)
+            return count, run
+        return setup
+
+    def _many(self, kind, paths):
+        def setup():
+            element = JSONElement(self._document(kind))
+            def run():
+                element.extract_many(paths)
+            return self._nodes(element.object()), run
+        return setup
+
+    def _construction(self, count):
+        def setup():
+            keys = [ 'store', 'book', 0, 'title', 'the "quoted" key', 12 ]
+            def run():
+                for index in range(count):
+                    path = JSONPath(f'$.store.book[{index % 100}]["title"]')
+                    for key in keys:
+                        path = path + key
+            return count, run
+        return setup
+
+    def _stream(self, kind, path):
+        def setup():
+            filename = self._file(f'{kind}.json', self._document(kind))
+            def run():
+                for element in JSONParser.iterextract(filename, path):
+                    pass
+            return self._nodes(self._document(kind)), run
+        return setup
+
+    def _lazy(self, kind, path, count):
+        def setup():
+            filename = self._file(f'{kind}.json', self._document(kind))
+            def run():
+                for _ in range(count):
+                    JSONParser.open(filename).first(path)
+            return count, run
+        return setup
+
+    def _compare(self, kind, rate, arguments):
+        def setup():
+            document1 = self._document(kind)
+            document2 = DocumentGenerator(self.seed + 1).mutate(document1, rate)
+            filename1 = self._file(f'{kind}.json', document1)
+            filename2 = self._file(f'{kind}-{rate}.json', document2)
+            argv = [ 'JSONCompare.py', filename1, filename2 ] + arguments
+            def run():
+                saved = sys.argv[:]
+                sys.argv[:] = argv
+                try:
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        JSONCompare().run()
+                finally:
+                    sys.argv[:] = saved
+            return self._nodes(document1) + self._nodes(document2), run
+        return setup
+
+    def all(self):
+        return [
+            Scenario('child',              'lookups', self._lookups('wide', '$.k1500.name', 100000)),
+            Scenario('index',              'lookups', self._lookups('arrays', '$.items[15000].id', 100000)),
+            Scenario('any',                'nodes',   self._extract('arrays', '$.items[*]', repeat=10)),
+            Scenario('any-resultset',      'nodes',   self._extract('arrays', '$.items[*].value', repeat=10, resultset=True)),
+            Scenario('regex',              'nodes',   self._extract('regexKeys', '$[r"key_1[0-9]*_a.*"]', repeat=10)),
+            Scenario('search',             'nodes',   self._extract('wide', '$..name')),
+            Scenario('search-indexed',     'nodes',   self._extract('wide', '$..name', indexed=True, repeat=10)),
+            Scenario('deepsearch',         'nodes',   self._extract('wide', '$...name')),
+            Scenario('deepsearch-indexed', 'nodes',   self._extract('wide', '$...name', indexed=True, repeat=10)),
+            Scenario('deepsearch-regex',   'nodes',   self._extract('regexKeys', '$...[r"key_2.*"]')),
+            Scenario('deep-document',      'nodes',   self._extract('deep', '$...value')),
+            Scenario('extract-many',       'nodes',   self._many('wide', [ '$..name', '$...ts', '$.k10[*]', '$...[r"k1[0-9]"].value' ])),
+            Scenario('path-construction',  'paths',   self._construction(20000)),
+            Scenario('stream',             'nodes',   self._stream('arrays', '$.items[*].id')),
+            Scenario('lazy-open',          'opens',   self._lazy('arrays', '$.items[15000].name', 3)),
+            Scenario('compare',            'nodes',   self._compare('arrays', 0.01, [])),
+            Scenario('compare-mapped',     'nodes',   self._compare('arrays', 0.01, [ '-m', '$.items=id', '-i', '$..ts', '$.matrix' ])),
+        ]